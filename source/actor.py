@@ -114,7 +114,7 @@ class Actor:
         :param pos: should be np.array([x, y])
         :return:
         """
-        return np.argmin([np.linalg.norm(node - pos) for node in self.nav.nodes])
+        return int(self.nav.nearest_nodes(np.asarray(pos)))
 
     def get_path(self, from_waypoint, to_waypoint, avoid_nodes=None):
         path = self.nav.navigate(from_waypoint, to_waypoint, avoid_nodes)
@@ -0,0 +1,317 @@
+from __future__ import annotations
+import numpy as np
+from shared import ZoneType, Winner, UNITS, FIELD
+from geometry import (
+    box_bounds, batch_transform, batch_inv_transform, batch_segments_intersect, batch_box_contains, batch_box_intersects,
+    batch_boxes_overlap)
+from robot import ROBOT, MotionConfig
+from bullet import BULLET
+from zone import ZONE
+
+
+class BATCH_GAME:
+    bullet_capacity = 32  # initial bullet slots per game, doubled whenever a game runs out
+    command_fields = ('x_speed', 'y_speed', 'rotation_speed', 'gimbal_yaw_speed', 'shoot')
+
+    # robot columns follow Game.robots: blue one, blue two, red one, red two
+    is_blue = np.array([True, True, False, False])
+    is_one = np.array([True, False, True, False])
+
+    outline_bounds = box_bounds([FIELD.outline])[0]
+    robot_outline_bounds = box_bounds([ROBOT.outline])[0]
+    robot_corners = np.array([(c.x, c.y) for c in ROBOT.outline.corners])
+    robot_half_dims = np.array((ROBOT.half_dims.x, ROBOT.half_dims.y))
+    armor_lines = np.array([((a.a.x, a.a.y), (a.b.x, a.b.y)) for a in ROBOT.armor_lines])
+    armor_damages = np.array(ROBOT.armor_damages, dtype=float)
+
+    barrier_bounds = box_bounds(FIELD.barriers)
+    barrier_centers = np.array([(b.center.x, b.center.y) for b in FIELD.barriers])
+    barrier_radii = np.array([b.radius for b in FIELD.barriers])
+    barrier_corners = np.array([[(c.x, c.y) for c in b.corners] for b in FIELD.barriers])
+    high_barrier_bounds = box_bounds(FIELD.high_barriers)
+    zone_bounds = box_bounds(ZONE.outlines)
+
+    full_turn = 360 * UNITS.d
+
+
+class BatchGame:
+    """
+    Steps `size` independent games at once with the rules of Game, keeping their state as NumPy arrays.
+    Robot arrays have shape (size, 4), zone arrays (size, 6) and bullet arrays (size, capacity).
+
+    Bullets are resolved against the robots' hp at the start of the bullet pass, so a robot killed
+    by one bullet of a tick still takes armor damage from the other bullets that reach it in that tick.
+    """
+
+    def __init__(self, size: int, seed=None):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+
+        robot_shape = (size, 4)
+        self.x, self.y = np.zeros(robot_shape), np.zeros(robot_shape)
+        self.rotation, self.gimbal_yaw = np.zeros(robot_shape), np.zeros(robot_shape)
+        self.x_speed, self.y_speed = np.zeros(robot_shape), np.zeros(robot_shape)
+        self.rotation_speed, self.gimbal_yaw_speed = np.zeros(robot_shape), np.zeros(robot_shape)
+        self.ammo, self.heat, self.hp = np.zeros(robot_shape), np.zeros(robot_shape), np.zeros(robot_shape)
+        self.is_shooting = np.zeros(robot_shape, dtype=bool)
+        self.shot_cooldown = np.zeros(robot_shape)
+        self.barrier_hits, self.robot_hits = np.zeros(robot_shape, dtype=int), np.zeros(robot_shape, dtype=int)
+        self.can_move, self.can_shoot = np.zeros(robot_shape, dtype=bool), np.zeros(robot_shape, dtype=bool)
+        self.debuff_timeout = np.zeros(robot_shape)
+        self.damage_taken = np.zeros((size, 2))  # blue, red
+
+        self.zone_index = np.zeros((size, len(ZoneType)), dtype=int)  # index into ZONE.outlines, -1 before the first reset
+        self.zone_activated = np.zeros((size, len(ZoneType)), dtype=bool)
+
+        bullet_shape = (size, BATCH_GAME.bullet_capacity)
+        self.bullet_x, self.bullet_y = np.zeros(bullet_shape), np.zeros(bullet_shape)
+        self.bullet_x_speed, self.bullet_y_speed = np.zeros(bullet_shape), np.zeros(bullet_shape)
+        self.bullet_owner = np.zeros(bullet_shape, dtype=np.int8)
+        self.bullet_alive = np.zeros(bullet_shape, dtype=bool)
+
+        self.time_remaining = np.zeros(size, dtype=int)
+        self.winner = np.zeros(size, dtype=np.int8)
+        self.reset()
+
+    def reset(self, mask: np.ndarray = None):
+        games = slice(None) if mask is None else mask
+        spawn_x = np.where(BATCH_GAME.is_blue, -1, 1) * FIELD.spawn_center.x
+        spawn_y = np.where(BATCH_GAME.is_blue == BATCH_GAME.is_one, -1, 1) * FIELD.spawn_center.y
+
+        self.x[games], self.y[games] = spawn_x, spawn_y
+        self.rotation[games] = np.where(BATCH_GAME.is_blue, 0., np.pi)
+        for array in (self.gimbal_yaw, self.x_speed, self.y_speed, self.rotation_speed, self.gimbal_yaw_speed,
+                      self.shot_cooldown, self.heat, self.barrier_hits, self.robot_hits, self.debuff_timeout, self.damage_taken):
+            array[games] = 0
+        self.ammo[games] = np.where(BATCH_GAME.is_one, 50, 0)
+        self.hp[games] = 2000
+        self.is_shooting[games] = False
+        self.can_move[games] = self.can_shoot[games] = True
+
+        self.zone_index[games] = -1
+        self.zone_activated[games] = False
+        self.bullet_alive[games] = False
+        self.time_remaining[games] = 180 * UNITS.s
+        self.winner[games] = Winner.tbd.value
+
+    @property
+    def bullet_capacity(self):
+        return self.bullet_alive.shape[1]
+
+    def step(self, commands: np.ndarray):
+        """Advances every game by one step, with commands of shape (size, 4, 5) laid out as BATCH_GAME.command_fields."""
+        commands = np.asarray(commands, dtype=float)
+        if (reset := self.time_remaining % (60 * UNITS.s) == 0).any():
+            self._reset_zones(reset)
+        self._control(commands)
+        for index in range(4):
+            self._step_robot(index)
+            self._apply_zones(index)
+            self._shoot(index)
+        self._step_bullets()
+        self.time_remaining -= 1
+        self._update_winner()
+
+    def _control(self, commands: np.ndarray):
+        alive = self.hp != 0
+        can_move, can_shoot = alive & self.can_move, alive & self.can_shoot
+        x_speed = np.where(can_move, commands[..., 0], 0.)
+        y_speed = np.where(can_move, commands[..., 1], 0.)
+        rotation_speed = np.where(can_move, commands[..., 2], 0.)
+        gimbal_yaw_speed = np.where(can_shoot, commands[..., 3], 0.)
+
+        x_accel = _accel_required(self.x_speed, x_speed, ROBOT.drive_config)
+        y_accel = _accel_required(self.y_speed, y_speed, ROBOT.drive_config)
+        rotation_accel = _accel_required(self.rotation_speed, rotation_speed, ROBOT.rotation_config)
+        gimbal_yaw_accel = _accel_required(self.gimbal_yaw_speed, gimbal_yaw_speed, ROBOT.gimbal_yaw_config)
+        magnitude = np.maximum(
+            np.abs(x_accel / ROBOT.drive_config.top_accel) + np.abs(y_accel / ROBOT.drive_config.top_accel) +
+            np.abs(rotation_accel / ROBOT.rotation_config.top_accel), 1)
+
+        self.x_speed = _new_speed(self.x_speed, x_accel / magnitude, ROBOT.drive_config)
+        self.y_speed = _new_speed(self.y_speed, y_accel / magnitude, ROBOT.drive_config)
+        self.rotation_speed = _new_speed(self.rotation_speed, rotation_accel / magnitude, ROBOT.rotation_config)
+        self.gimbal_yaw_speed = _new_speed(self.gimbal_yaw_speed, gimbal_yaw_accel, ROBOT.gimbal_yaw_config)
+        self.is_shooting = can_shoot & (commands[..., 4] != 0)
+
+    def _step_robot(self, index: int):
+        self.debuff_timeout[:, index] -= np.minimum(1, self.debuff_timeout[:, index])
+        self.shot_cooldown[:, index] -= np.minimum(1, self.shot_cooldown[:, index])
+
+        if (settle := self.time_remaining % (0.1 * UNITS.s) == 0).any():
+            self._settle_heat(index, settle)
+        cleared = self.debuff_timeout[:, index] == 0
+        self.can_move[cleared, index] = True
+        self.can_shoot[cleared, index] = True
+        alive = self.hp[:, index] != 0
+
+        moving = alive & ((self.x_speed[:, index] != 0) | (self.y_speed[:, index] != 0) | (self.rotation_speed[:, index] != 0))
+        if moving.any():
+            games = np.nonzero(moving)[0]
+            rotation = self.rotation[games, index]
+            speed = np.stack((self.x_speed[games, index], self.y_speed[games, index]), axis=-1)
+            center = np.stack((self.x[games, index], self.y[games, index]), axis=-1) + batch_transform(speed, 0., rotation)
+            rotation = (rotation + self.rotation_speed[games, index]) % BATCH_GAME.full_turn
+
+            hits = self._hits(games, index, center, rotation)
+            moved, rebounded = games[~hits], games[hits]
+            self.x[moved, index], self.y[moved, index] = center[~hits, 0], center[~hits, 1]
+            self.rotation[moved, index] = rotation[~hits]
+            for speed in (self.x_speed, self.y_speed, self.rotation_speed):
+                speed[rebounded, index] *= -ROBOT.rebound_coeff
+        self.gimbal_yaw[alive, index] = (self.gimbal_yaw[alive, index] + self.gimbal_yaw_speed[alive, index]) % BATCH_GAME.full_turn
+
+    def _hits(self, games: np.ndarray, index: int, center: np.ndarray, rotation: np.ndarray):
+        corners = batch_transform(BATCH_GAME.robot_corners, center[:, None], rotation[:, None])
+        leaves_field = ~batch_box_contains(BATCH_GAME.outline_bounds, corners).all(axis=1)
+
+        near_barrier = np.linalg.norm(center[:, None] - BATCH_GAME.barrier_centers, axis=-1) < \
+            ROBOT.outline.radius + BATCH_GAME.barrier_radii
+        corners_in_barrier = batch_box_contains(BATCH_GAME.barrier_bounds[:, None], corners[:, None]).any(axis=-1)
+        barrier_corners = batch_inv_transform(BATCH_GAME.barrier_corners, center[:, None, None], rotation[:, None, None])
+        barrier_in_robot = batch_box_contains(BATCH_GAME.robot_outline_bounds, barrier_corners).any(axis=-1)
+        hits_barrier = (near_barrier & (corners_in_barrier | barrier_in_robot)).any(axis=1)
+        self.barrier_hits[games[hits_barrier], index] += 1
+
+        hits_robot = np.zeros(len(games), dtype=bool)
+        for other in range(4):
+            if other == index:
+                continue
+            other_center = np.stack((self.x[games, other], self.y[games, other]), axis=-1)
+            near = np.linalg.norm(center - other_center, axis=-1) < 2 * ROBOT.outline.radius
+            hits_robot |= near & batch_boxes_overlap(
+                BATCH_GAME.robot_half_dims, rotation, BATCH_GAME.robot_half_dims, self.rotation[games, other], other_center - center)
+        self.robot_hits[games[hits_robot], index] += 1
+
+        return leaves_field | hits_barrier | hits_robot
+
+    def _settle_heat(self, index: int, games: np.ndarray):  # rules 4.1.2
+        hp, heat = self.hp[games, index], self.heat[games, index]
+        heat = np.maximum(heat - np.where(hp >= 400, 12, 24), 0)
+        hp = np.where((240 < heat) & (heat < 360), hp - (heat - 240) * 4, hp)
+        overheated = 360 <= heat
+        hp = np.where(overheated, hp - (heat - 360) * 40, hp)
+        heat = np.where(overheated, 360, heat)
+        self.hp[games, index], self.heat[games, index] = np.maximum(hp, 0), heat
+
+    def _apply_zones(self, index: int):
+        center = np.stack((self.x[:, index], self.y[:, index]), axis=-1)
+        entered = ~self.zone_activated & (self.zone_index >= 0) & \
+            batch_box_contains(BATCH_GAME.zone_bounds[self.zone_index], center[:, None])
+        self.zone_activated |= entered
+
+        for zone_type in ZoneType:
+            games = entered[:, zone_type.value]
+            if not games.any():
+                continue
+            if zone_type is ZoneType.blue_hp_buff:
+                self.hp[games, :2] += 200
+            elif zone_type is ZoneType.red_hp_buff:
+                self.hp[games, 2:] += 200
+            elif zone_type is ZoneType.blue_ammo_buff:
+                self.ammo[games, :2] += 100
+            elif zone_type is ZoneType.red_ammo_buff:
+                self.ammo[games, 2:] += 100
+            elif zone_type is ZoneType.move_debuff:
+                self.can_move[games, index] = False
+                self.debuff_timeout[games, index] = 10 * UNITS.s
+            elif zone_type is ZoneType.shoot_debuff:
+                self.can_shoot[games, index] = False
+                self.debuff_timeout[games, index] = 10 * UNITS.s
+
+    def _shoot(self, index: int):
+        fires = self.is_shooting[:, index] & (self.shot_cooldown[:, index] == 0) & (self.ammo[:, index] != 0) & self.can_shoot[:, index]
+        if not fires.any():
+            return
+        games = np.nonzero(fires)[0]
+        self.ammo[games, index] -= 1
+        self.heat[games, index] += BULLET.speed
+        self.shot_cooldown[games, index] = ROBOT.shot_cooldown
+
+        if self.bullet_alive[games].all(axis=1).any():
+            self._grow_bullets()
+        slots = np.argmin(self.bullet_alive[games], axis=1)
+        relative_speed = np.stack((
+            self._rng.normal(BULLET.speed, BULLET.sigma_x_speed, len(games)),
+            self._rng.normal(0., BULLET.sigma_y_speed, len(games))), axis=-1)
+        speed = batch_transform(relative_speed, 0., self.rotation[games, index] + self.gimbal_yaw[games, index])
+
+        self.bullet_x[games, slots], self.bullet_y[games, slots] = self.x[games, index], self.y[games, index]
+        self.bullet_x_speed[games, slots] = speed[:, 0] + self.x_speed[games, index]
+        self.bullet_y_speed[games, slots] = speed[:, 1] + self.y_speed[games, index]
+        self.bullet_owner[games, slots] = index
+        self.bullet_alive[games, slots] = True
+
+    def _grow_bullets(self):
+        pad = ((0, 0), (0, self.bullet_capacity))
+        self.bullet_x, self.bullet_y = np.pad(self.bullet_x, pad), np.pad(self.bullet_y, pad)
+        self.bullet_x_speed, self.bullet_y_speed = np.pad(self.bullet_x_speed, pad), np.pad(self.bullet_y_speed, pad)
+        self.bullet_owner, self.bullet_alive = np.pad(self.bullet_owner, pad), np.pad(self.bullet_alive, pad)
+
+    def _step_bullets(self):
+        games = np.nonzero(self.bullet_alive.any(axis=1))[0]
+        if not len(games):
+            return
+        alive = self.bullet_alive[games]
+        old_center = np.stack((self.bullet_x[games], self.bullet_y[games]), axis=-1)
+        self.bullet_x[games] += np.where(alive, self.bullet_x_speed[games], 0.)
+        self.bullet_y[games] += np.where(alive, self.bullet_y_speed[games], 0.)
+        center = np.stack((self.bullet_x[games], self.bullet_y[games]), axis=-1)
+
+        hits = ~batch_box_contains(BATCH_GAME.outline_bounds, center)
+        hits |= batch_box_intersects(BATCH_GAME.high_barrier_bounds, old_center[..., None, :], center[..., None, :]).any(axis=-1)
+
+        absorbed = np.zeros_like(alive)
+        for index in range(4):
+            robot_center = np.stack((self.x[games, index], self.y[games, index]), axis=-1)[:, None]
+            rotation = self.rotation[games, index][:, None]
+            armor_lines = batch_transform(BATCH_GAME.armor_lines, robot_center[..., None, :], rotation[..., None])
+            armor_hits = batch_segments_intersect(
+                old_center[..., None, :], center[..., None, :], armor_lines[:, None, :, 0], armor_lines[:, None, :, 1])
+            has_hp = (self.hp[games, index] != 0)[:, None]
+            absorbs = (has_hp & armor_hits.any(axis=-1)) | batch_box_intersects(
+                BATCH_GAME.robot_outline_bounds,
+                batch_inv_transform(old_center, robot_center, rotation), batch_inv_transform(center, robot_center, rotation))
+            absorbs &= alive & ~absorbed & (self.bullet_owner[games] != index)
+
+            damages = np.where(absorbs & has_hp & armor_hits.any(axis=-1),
+                               BATCH_GAME.armor_damages[np.argmax(armor_hits, axis=-1)], 0.).sum(axis=1)
+            self.hp[games, index] -= damages
+            self.damage_taken[games, 0 if BATCH_GAME.is_blue[index] else 1] += damages
+            absorbed |= absorbs
+
+        self.bullet_alive[games] = alive & ~(hits | absorbed)
+
+    def _update_winner(self):
+        blues_dead = (self.hp[:, :2] == 0).all(axis=1)
+        reds_dead = (self.hp[:, 2:] == 0).all(axis=1)
+        damage_difference = self.damage_taken[:, 1] - self.damage_taken[:, 0]
+
+        by_damage = ~(blues_dead ^ reds_dead) & (self.time_remaining <= 0)
+        self.winner[reds_dead & ~blues_dead] = Winner.blue.value
+        self.winner[blues_dead & ~reds_dead] = Winner.red.value
+        self.winner[by_damage & (damage_difference > 0)] = Winner.blue.value
+        self.winner[by_damage & (damage_difference < 0)] = Winner.red.value
+        self.winner[by_damage & (damage_difference == 0)] = Winner.tied.value
+
+    def _reset_zones(self, games: np.ndarray):
+        count = np.count_nonzero(games)
+        positions = 2 * np.argsort(self._rng.random((count, 3)), axis=1)  # randomly order F1/F2/F3 (0/2/4)
+        sides = self._rng.integers(0, 2, (count, 3))  # randomly choose left/right (0/1) side of field
+        indices = np.empty((count, 6), dtype=int)
+        indices[:, 0::2] = positions + sides
+        indices[:, 1::2] = positions + 1 - sides
+        self.zone_index[games] = indices
+        self.zone_activated[games] = False
+
+
+def _new_speed(current_speed: np.ndarray, accel: np.ndarray, config: MotionConfig):
+    new_speed_ideal = current_speed + accel
+    new_speed_magnitude = np.abs(new_speed_ideal) - config.friction_decel - np.abs(current_speed) * config.friction_coeff
+    return np.copysign(np.maximum(0., new_speed_magnitude), new_speed_ideal)
+
+
+def _accel_required(current_speed: np.ndarray, desired_speed: np.ndarray, config: MotionConfig):
+    new_speed = np.clip(desired_speed, -config.top_speed, config.top_speed)
+    accel = new_speed - current_speed + np.copysign(config.friction_decel, current_speed) + current_speed * config.friction_coeff
+    return np.where((current_speed == 0) & (desired_speed == 0), 0., np.clip(accel, -config.top_accel, config.top_accel))
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import heapq
+import math
+import typing
+import numpy as np
+from shared import FIELD
+from geometry import box_bounds, batch_transform, batch_inv_transform, batch_segments_intersect, batch_box_contains, batch_box_intersects
+from robot import ROBOT
+from field_grid import FieldGrid
+from events import EventType
+
+if typing.TYPE_CHECKING:
+    from robot import Robot
+    from events import EventBuffer
+
+
+class BULLET_POOL:
+    capacity = 32  # initial slots, doubled whenever the pool runs out
+
+    outline_bounds = box_bounds([FIELD.outline])[0]
+    robot_outline_bounds = box_bounds([ROBOT.outline])[0]
+    armor_lines = np.array([((a.a.x, a.a.y), (a.b.x, a.b.y)) for a in ROBOT.armor_lines])
+
+
+class BulletPool:
+    """
+    Bullets in flight stored as arrays, advanced and collided together. Slots of dead bullets are reused,
+    lowest first, so the slot layout only depends on which slots are alive.
+    """
+
+    def __init__(self, capacity: int = BULLET_POOL.capacity):
+        self.centers = np.zeros((capacity, 2))
+        self.speeds = np.zeros((capacity, 2))
+        self.owners = np.zeros(capacity, dtype=np.int8)  # index into Game.robots
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._free = list(range(capacity))  # heap of free slots
+
+    def __len__(self):
+        return len(self.alive) - len(self._free)
+
+    def spawn(self, owner_index: int, owner: Robot, spread: tuple[float, float]):
+        if not self._free:
+            self._grow()
+        slot = heapq.heappop(self._free)
+        x_speed, y_speed = spread
+        sin, cos = math.sin(owner.rotation + owner.gimbal_yaw), math.cos(owner.rotation + owner.gimbal_yaw)
+        self.centers[slot] = owner.center.x, owner.center.y
+        self.speeds[slot] = cos * x_speed - sin * y_speed + owner.speed.x, sin * x_speed + cos * y_speed + owner.speed.y
+        self.owners[slot] = owner_index
+        self.alive[slot] = True
+
+    def step(self, robots: tuple[Robot, Robot, Robot, Robot], events: EventBuffer = None):
+        if not len(self):
+            return
+        slots = np.flatnonzero(self.alive)
+        old_centers = self.centers[slots]
+        centers = old_centers + self.speeds[slots]
+        self.centers[slots] = centers
+
+        hits = ~batch_box_contains(BULLET_POOL.outline_bounds, centers) | FieldGrid.high_barriers().intersects(old_centers, centers)
+
+        robot_centers = np.array([(r.center.x, r.center.y) for r in robots])
+        rotations = np.array([r.rotation for r in robots])
+        outline_hits = batch_box_intersects(
+            BULLET_POOL.robot_outline_bounds,
+            batch_inv_transform(old_centers[:, None], robot_centers, rotations), batch_inv_transform(centers[:, None], robot_centers, rotations))
+        armor_lines = batch_transform(BULLET_POOL.armor_lines, robot_centers[:, None, None], rotations[:, None, None])
+        armor_hits = batch_segments_intersect(
+            old_centers[:, None, None], centers[:, None, None], armor_lines[:, :, 0], armor_lines[:, :, 1])
+        contacts = (armor_hits.any(axis=2) | outline_hits) & (self.owners[slots, None] != np.arange(len(robots)))
+
+        outline_robots = {}  # bullet index to the robot whose outline stopped it, bullets stopped by armor map to None
+        for index in np.flatnonzero(contacts.any(axis=1))[::-1]:  # damage is rare, apply it bullet by bullet with the robot rules
+            for robot_index in np.flatnonzero(contacts[index]):
+                robot = robots[robot_index]
+                hp = robot.hp
+                if robot.absorbs_bullet(armor_hits[index, robot_index], outline_hits[index, robot_index]):
+                    hits[index] = True
+                    outline_robots[index] = robot_index if robot.hp == hp else None
+                    if robot.hp != hp and events is not None:
+                        owner = int(self.owners[slots[index]])
+                        plate = int(np.argmax(armor_hits[index, robot_index]))
+                        events.emit(EventType.armor_hit, robot_index, owner, plate, hp - robot.hp)
+                        if robot.hp <= 0 < hp:  # armor damage can leave hp below zero until Robot.settle_heat
+                            events.emit(EventType.robot_killed, robot_index, owner)
+                    break
+
+        dead = slots[hits]
+        if events is not None:
+            for index in np.flatnonzero(hits).tolist():
+                if (robot_index := outline_robots.get(index, -1)) is not None:
+                    events.emit(EventType.bullet_expired, robot_index, int(self.owners[slots[index]]))
+        self.alive[dead] = False
+        for slot in dead.tolist():
+            heapq.heappush(self._free, slot)
+
+    def state(self) -> np.ndarray:
+        """Slot, center, speed and owner of every bullet in flight, one row each."""
+        slots = np.flatnonzero(self.alive)
+        return np.column_stack((slots, self.centers[slots], self.speeds[slots], self.owners[slots]))
+
+    def load_state(self, state: np.ndarray):
+        slots = state[:, 0].astype(int)
+        while len(slots) and slots.max() >= len(self.alive):
+            self._grow()
+        self.alive[:] = False
+        self.alive[slots] = True
+        self.centers[slots], self.speeds[slots], self.owners[slots] = state[:, 1:3], state[:, 3:5], state[:, 5]
+        self._free = np.flatnonzero(~self.alive).tolist()
+
+    def _grow(self):
+        capacity = len(self.alive)
+        self.centers = np.concatenate((self.centers, np.zeros((capacity, 2))))
+        self.speeds = np.concatenate((self.speeds, np.zeros((capacity, 2))))
+        self.owners = np.concatenate((self.owners, np.zeros(capacity, dtype=np.int8)))
+        self.alive = np.concatenate((self.alive, np.zeros(capacity, dtype=bool)))
+        self._free.extend(range(capacity, 2 * capacity))
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import os
+import math
+import zipfile
+import tempfile
+import functools
+import contextlib
+import typing
+import numpy as np
+from shared import UNITS, FIELD, ASSETS_DIR
+from geometry import box_bounds, batch_transform, batch_inv_transform, batch_box_contains
+
+if typing.TYPE_CHECKING:
+    from geometry import Vector
+
+
+class COLLISION_TABLE:
+    file = ASSETS_DIR / 'collision_table.npz'  # generated on first use, not tracked
+    cell = 4.  # [pixel]
+    rotation_cell = 2 * UNITS.d
+    rotation_period = 180 * UNITS.d  # the robot outline is symmetric under a half turn
+
+    free = 0  # no pose in the cell touches the field outline or a barrier
+    field = 1  # every pose in the cell leaves the field and none can touch a barrier
+    barrier = 2  # every pose in the cell hits a barrier
+    unknown = 3  # the cell straddles a boundary, use the exact test
+
+
+class CollisionTable:
+    """
+    Static collision results of ROBOT.outline against FIELD.outline and all barriers, over a grid of
+    (x, y, rotation) robot poses. Each cell is classified conservatively: a cell is only free, field or
+    barrier when every pose inside it agrees with the exact test in Robot.hits_static.
+    """
+
+    def __init__(self, cells: np.ndarray):
+        self.cells = cells
+
+    @classmethod
+    @functools.cache
+    def load(cls) -> CollisionTable:
+        signature = cls._signature()
+        try:
+            with np.load(COLLISION_TABLE.file) as data:
+                if np.array_equal(data['signature'], signature):
+                    return cls(data['cells'])
+        except (OSError, EOFError, zipfile.BadZipFile, KeyError, ValueError):  # missing, or damaged by an interrupted write
+            pass
+        table = cls.build()
+        table._save(signature)
+        return table
+
+    @classmethod
+    def build(cls) -> CollisionTable:
+        from robot import ROBOT
+
+        xs, ys = cls._cell_centers(FIELD.outline.l, FIELD.outline.r), cls._cell_centers(FIELD.outline.b, FIELD.outline.t)
+        rotations = cls._cell_centers(0., COLLISION_TABLE.rotation_period, COLLISION_TABLE.rotation_cell)
+        centers = np.stack(np.meshgrid(xs, ys, indexing='ij'), axis=-1).reshape(-1, 2)
+
+        half_diagonal = COLLISION_TABLE.cell / math.sqrt(2)
+        margin = half_diagonal + 2 * ROBOT.outline.radius * math.sin(COLLISION_TABLE.rotation_cell / 2)
+        field_bounds = box_bounds([FIELD.outline])[0]
+        robot_bounds = box_bounds([ROBOT.outline])[0]
+        robot_corners = np.array([(c.x, c.y) for c in ROBOT.outline.corners])
+        barrier_bounds = box_bounds(FIELD.barriers)
+        barrier_centers = np.array([(b.center.x, b.center.y) for b in FIELD.barriers])
+        barrier_corners = np.array([[(c.x, c.y) for c in b.corners] for b in FIELD.barriers])
+        reach = ROBOT.outline.radius + np.array([b.radius for b in FIELD.barriers])
+        distances = np.linalg.norm(centers[:, None] - barrier_centers, axis=-1)
+
+        cells = np.empty((len(xs), len(ys), len(rotations)), dtype=np.uint8)
+        for index, rotation in enumerate(rotations):
+            corners = batch_transform(robot_corners, centers[:, None], rotation)
+            local_barrier_corners = batch_inv_transform(barrier_corners, centers[:, None, None], rotation)
+
+            def touches_barrier(grow: float):
+                corners_in_barrier = batch_box_contains(_grown(barrier_bounds, grow)[:, None], corners[:, None]).any(axis=-1)
+                barrier_in_robot = batch_box_contains(_grown(robot_bounds, grow), local_barrier_corners).any(axis=-1)
+                return corners_in_barrier | barrier_in_robot
+
+            barrier_possible = ((distances - half_diagonal < reach) & touches_barrier(margin)).any(axis=1)
+            barrier_certain = ((distances + half_diagonal < reach) & touches_barrier(-margin)).any(axis=1)
+            field_free = batch_box_contains(_grown(field_bounds, -margin), corners).all(axis=1)
+            field_certain = ~batch_box_contains(_grown(field_bounds, margin), corners).all(axis=1)
+
+            result = np.full(len(centers), COLLISION_TABLE.unknown, dtype=np.uint8)
+            result[~barrier_possible & field_certain] = COLLISION_TABLE.field
+            result[~barrier_possible & field_free] = COLLISION_TABLE.free
+            result[barrier_certain] = COLLISION_TABLE.barrier
+            cells[..., index] = result.reshape(len(xs), len(ys))
+        return cls(cells)
+
+    def _save(self, signature: np.ndarray):
+        # processes building the table at once each write a temporary file and move it into place whole,
+        # so readers never open a partial file. Where the assets are read-only the table just stays in memory.
+        try:
+            file = tempfile.NamedTemporaryFile(dir=COLLISION_TABLE.file.parent, suffix='.npz', delete=False)
+        except OSError:
+            return
+        try:
+            with file:
+                np.savez_compressed(file, cells=self.cells, signature=signature)
+            os.replace(file.name, COLLISION_TABLE.file)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(file.name)
+
+    def lookup(self, center: Vector, rotation: float) -> int:
+        x_index = int((center.x - FIELD.outline.l) // COLLISION_TABLE.cell)
+        y_index = int((center.y - FIELD.outline.b) // COLLISION_TABLE.cell)
+        if not (0 <= x_index < self.cells.shape[0] and 0 <= y_index < self.cells.shape[1]):
+            return COLLISION_TABLE.unknown
+        rotation_index = int(rotation % COLLISION_TABLE.rotation_period // COLLISION_TABLE.rotation_cell) % self.cells.shape[2]
+        return self.cells[x_index, y_index, rotation_index]
+
+    @staticmethod
+    def _cell_centers(start: float, stop: float, step: float = COLLISION_TABLE.cell):
+        return start + step * (np.arange(math.ceil((stop - start) / step)) + 0.5)
+
+    @staticmethod
+    def _signature():
+        from robot import ROBOT
+        return np.array([
+            COLLISION_TABLE.cell, COLLISION_TABLE.rotation_cell, *box_bounds([FIELD.outline, ROBOT.outline]).ravel(),
+            *box_bounds(FIELD.barriers).ravel()])
+
+
+def _grown(bounds: np.ndarray, distance: float):
+    return bounds + np.array([-distance, distance, -distance, distance])
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import enum
+import numpy as np
+
+
+class EventType(enum.IntEnum):
+    armor_hit = 0  # detail is the plate index into ROBOT.armor_damages, value the damage, source the shooter
+    bullet_expired = 1  # a bullet left the game without hitting armor, robot is the one whose outline it hit or -1
+    zone_activated = 2  # detail is the ZoneType value
+    debuff_applied = 3  # detail is the ZoneType value, value the timeout in [step]
+    heat_damage = 4  # value is the hp lost
+    robot_killed = 5  # source is the shooter, or -1 for heat
+    winner_decided = 6  # one per robot, detail is the Winner value, value 1 for the winners, -1 for the losers and 0 on a tie
+
+
+class EVENTS:
+    capacity = 16  # initial rows, doubled whenever a step emits more
+    valued = (EventType.armor_hit, EventType.heat_damage, EventType.winner_decided)  # rewards scale with the value of these
+
+
+class EventBuffer:
+    """
+    Events of the last Game.step as preallocated columns, the first `count` rows of `types`, `robots`,
+    `sources`, `details` and `values` are valid. Robots and sources index into Game.robots, -1 for none.
+    """
+
+    def __init__(self, capacity: int = EVENTS.capacity):
+        self.types = np.zeros(capacity, dtype=np.int8)
+        self.robots = np.zeros(capacity, dtype=np.int8)
+        self.sources = np.zeros(capacity, dtype=np.int8)
+        self.details = np.zeros(capacity, dtype=np.int8)
+        self.values = np.zeros(capacity)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, type_: EventType, robot: int = -1, source: int = -1, detail: int = 0, value: float = 0.):
+        if self.count == len(self.types):
+            self._grow()
+        row = self.count
+        self.types[row], self.robots[row], self.sources[row], self.details[row], self.values[row] = type_, robot, source, detail, value
+        self.count += 1
+
+    def of_type(self, type_: EventType) -> np.ndarray:
+        """Rows of the events of `type_`."""
+        return np.flatnonzero(self.types[:self.count] == type_)
+
+    def _grow(self):
+        capacity = len(self.types)
+        for name in ('types', 'robots', 'sources', 'details', 'values'):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.zeros(capacity, dtype=column.dtype))))
+
+
+class REWARD:
+    # weight per event, or per unit of value for EVENTS.valued types, given to the robot an event happened to
+    robot_weights = {EventType.armor_hit: -1., EventType.heat_damage: -1., EventType.robot_killed: -100., EventType.winner_decided: 500.}
+    # given to the robot that caused it
+    source_weights = {EventType.armor_hit: 1., EventType.robot_killed: 100.}
+
+
+class RewardAccumulator:
+    """
+    Sums weighted events into one reward per robot in Game.robots order. Attach one as Game.rewards to
+    have it read the EventBuffer after every step, and take `totals` with `pop` whenever the rewards are used.
+    """
+
+    def __init__(self, robot_weights: dict[EventType, float] = None, source_weights: dict[EventType, float] = None):
+        self._robot_weights = self._weight_table(REWARD.robot_weights if robot_weights is None else robot_weights)
+        self._source_weights = self._weight_table(REWARD.source_weights if source_weights is None else source_weights)
+        self._valued = np.isin(np.arange(len(EventType)), EVENTS.valued)
+        self.totals = np.zeros(4)
+
+    def add(self, events: EventBuffer):
+        if not events.count:
+            return
+        types, robots, sources = events.types[:events.count], events.robots[:events.count], events.sources[:events.count]
+        amounts = np.where(self._valued[types], events.values[:events.count], 1.)
+        has_robot, has_source = robots >= 0, sources >= 0
+        np.add.at(self.totals, robots[has_robot], (self._robot_weights[types] * amounts)[has_robot])
+        np.add.at(self.totals, sources[has_source], (self._source_weights[types] * amounts)[has_source])
+
+    def pop(self) -> np.ndarray:
+        """Rewards summed since the last pop."""
+        totals, self.totals = self.totals, np.zeros(4)
+        return totals
+
+    @staticmethod
+    def _weight_table(weights: dict[EventType, float]):
+        table = np.zeros(len(EventType))
+        for type_, weight in weights.items():
+            table[type_] = weight
+        return table
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import functools
+import math
+import typing
+import numpy as np
+from shared import UNITS, FIELD
+from geometry import box_bounds, batch_box_intersects
+
+if typing.TYPE_CHECKING:
+    from geometry import Box
+
+
+class FIELD_GRID:
+    cell = 0.25 * UNITS.m
+    padding = 1e-6  # boxes touching a cell border are registered in the cells on both sides
+    direct_tests = 2048  # up to this many segment-box pairs, testing every pair beats tracing the cells
+
+
+class FieldGrid:
+    """
+    Uniform grid over FIELD.outline whose cells hold a bitmask of the static boxes overlapping them.
+    Segments are traced cell by cell, and only the boxes met along the way get the exact Box.intersects test.
+    Tracing costs a Python loop over the longest segment, so few segments against few boxes are tested directly.
+    """
+
+    def __init__(self, boxes: typing.Sequence[Box], cell: float = FIELD_GRID.cell):
+        assert len(boxes) <= 64, 'box masks are stored in 64 bits'
+        self.cell = cell
+        self.bounds = box_bounds(boxes)
+        self.origin = np.array((FIELD.outline.l, FIELD.outline.b))
+        self.shape = math.ceil(FIELD.outline.dims.x / cell), math.ceil(FIELD.outline.dims.y / cell)
+        self.masks = np.zeros(self.shape, dtype=np.uint64)
+
+        for index, (l, r, b, t) in enumerate(self.bounds):
+            (x_start, y_start), (x_stop, y_stop) = self._cell_of(np.array([
+                (l - FIELD_GRID.padding, b - FIELD_GRID.padding), (r + FIELD_GRID.padding, t + FIELD_GRID.padding)]))
+            self.masks[x_start:x_stop + 1, y_start:y_stop + 1] |= np.uint64(1 << index)
+
+    @classmethod
+    @functools.cache
+    def high_barriers(cls) -> FieldGrid:
+        return cls(FIELD.high_barriers)
+
+    def intersects(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Whether each segment starts[i] -> ends[i] intersects any box, for segments starting inside the field."""
+        if len(starts) * len(self.bounds) <= FIELD_GRID.direct_tests:
+            return batch_box_intersects(self.bounds, starts[:, None], ends[:, None]).any(axis=1)
+        masks = self._traverse(starts, ends)
+        segments, boxes = np.nonzero((masks[:, None] >> np.arange(len(self.bounds), dtype=np.uint64)) & np.uint64(1))
+        hits = np.zeros(len(starts), dtype=bool)
+        if len(segments):
+            exact = batch_box_intersects(self.bounds[boxes], starts[segments], ends[segments])
+            hits[segments[exact]] = True
+        return hits
+
+    def _cell_of(self, points: np.ndarray):
+        return np.clip(((points - self.origin) // self.cell).astype(int), 0, np.array(self.shape) - 1)
+
+    def _traverse(self, starts: np.ndarray, ends: np.ndarray):
+        # Amanatides-Woo traversal run for all segments in lockstep, OR-ing the masks of every visited cell
+        cells, last_cells = self._cell_of(starts), self._cell_of(ends)
+        counts = np.abs(last_cells - cells).sum(axis=1) + 1
+        directions = ends - starts
+        steps = np.where(directions < 0, -1, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deltas = np.where(directions != 0, self.cell / np.abs(directions), np.inf)
+            borders = self.origin + (cells + (steps > 0)) * self.cell
+            next_crossings = np.where(directions != 0, (borders - starts) / directions, np.inf)
+
+        masks = np.zeros(len(starts), dtype=np.uint64)
+        for count in range(counts.max()):
+            active = count < counts
+            masks[active] |= self.masks[cells[active, 0], cells[active, 1]]
+            axis = (next_crossings[:, 1] < next_crossings[:, 0]).astype(int)
+            rows = np.arange(len(starts))
+            cells[rows, axis] = np.clip(cells[rows, axis] + steps[rows, axis], 0, np.array(self.shape)[axis] - 1)
+            next_crossings[rows, axis] += deltas[rows, axis]
+        return masks
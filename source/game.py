@@ -1,20 +1,47 @@
 from __future__ import annotations
 import typing
-import random
-import time
+import struct
 import functools
-from shared import ZoneType, Winner, UNITS, FIELD
+import dataclasses
+import numpy as np
+from shared import ZoneType, Winner, UNITS, number_from_state
 from zone import Zone
 from team import Team
+from bullet_pool import BulletPool
+from collision_table import CollisionTable
+from observation import Observation
+from game_random import GameRandom, GAME_RANDOM
+from visibility import Visibility
+from lidar import Lidar
+from robot import ROBOT
+from robot_pairs import RobotPairs
+from events import EventBuffer, EventType, RewardAccumulator
 
 if typing.TYPE_CHECKING:
-    from bullet import Bullet
-    from geometry import LineSegment
     from robot import RobotCommand, Robot
+    from recorder import Recorder
+    from step_stats import StepStats
+
+
+class SNAPSHOT:
+    header = struct.Struct('<iBH')  # time remaining, winner, bullet count
+    # followed by the GameRandom state and float64 team damages, robot states, zone (index, is_activated) pairs and bullet rows
+    fixed_size = 2 + 4 * len(ROBOT.state_fields) + 2 * len(ZoneType)
+    bullet_size = 6
+
+
+@dataclasses.dataclass
+class StepSummary:
+    """What happened to each robot over the steps of Game.step_n, in Game.robots order."""
+    steps: int = 0
+    hp_lost: list[float] = dataclasses.field(default_factory=lambda: [0] * 4)  # to bullets and heat, before any hp buff
+    barrier_hits: list[int] = dataclasses.field(default_factory=lambda: [0] * 4)
+    robot_hits: list[int] = dataclasses.field(default_factory=lambda: [0] * 4)
+    killed: list[bool] = dataclasses.field(default_factory=lambda: [False] * 4)
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, use_collision_table=False, seed: int | np.random.SeedSequence | None = None):
         self.zones = {
             ZoneType.blue_hp_buff: Zone(ZoneType.blue_hp_buff),
             ZoneType.red_hp_buff: Zone(ZoneType.red_hp_buff),
@@ -27,41 +54,184 @@ class Game:
             True: Team(True),
             False: Team(False)
         }
-        self.bullets: list[Bullet] = []
+        self.random = GameRandom(seed)
+        self.bullets = BulletPool()
         self.time_remaining = 180 * UNITS.s
         self.winner = Winner.tbd
-        random.seed(time.time())
-        
+        self.collision_table = CollisionTable.load() if use_collision_table else None
+        self.robot_pairs = RobotPairs()
+        self.observation = Observation()
+        self.observation.update(self)
+        self.recorder: Recorder | None = None
+        self.stats: StepStats | None = None
+        self.events = EventBuffer()
+        self.rewards: RewardAccumulator | None = None
+        self._visibility: Visibility | None = None
+        self._lidar_ranges: np.ndarray | None = None
+
     @functools.cached_property
     def robots(self) -> tuple[Robot, Robot, Robot, Robot]:
         return self.teams[True].robots[True], self.teams[True].robots[False], self.teams[False].robots[True], self.teams[False].robots[False]
 
     def step(self, blue_commands: tuple[RobotCommand, RobotCommand], red_commands: tuple[RobotCommand, RobotCommand]):
+        self.events.clear()
+        self._step((*blue_commands, *red_commands))
+        if self.rewards is not None:
+            self.rewards.add(self.events)
+
+    def step_n(self, blue_commands: tuple[RobotCommand, RobotCommand], red_commands: tuple[RobotCommand, RobotCommand],
+               k: int) -> StepSummary:
+        """
+        Steps up to k times holding the same commands, like k calls to step, and stops early after the step
+        where a robot is killed or the game is won. The observation is updated once, after the last step,
+        and the event buffer holds the events of all the steps.
+        """
+        self.events.clear()
+        robots = self.robots
+        commands = (*blue_commands, *red_commands)
+        summary = StepSummary()
+        barrier_hits, robot_hits = [r.barrier_hits for r in robots], [r.robot_hits for r in robots]
+        hps = [r.hp for r in robots]
+        for _ in range(k):
+            self._step(commands, update_winner=False, observe=False)
+            summary.steps += 1
+
+            killed = hp_gone = False
+            for index, robot in enumerate(robots):
+                if robot.hp != hps[index]:
+                    # armor damage can leave hp below zero until settle_heat clears it, that part is not lost hp
+                    summary.hp_lost[index] += max(max(hps[index], 0) - max(robot.hp, 0), 0)
+                    if robot.hp <= 0:
+                        hp_gone = True
+                        if hps[index] > 0:
+                            summary.killed[index] = killed = True
+                    hps[index] = robot.hp
+            if hp_gone or self.time_remaining <= 0:  # the only ways the winner can change
+                self._update_winner()
+            if killed or self.winner is not Winner.tbd:
+                break
+
+        summary.barrier_hits = [r.barrier_hits - hits for r, hits in zip(robots, barrier_hits)]
+        summary.robot_hits = [r.robot_hits - hits for r, hits in zip(robots, robot_hits)]
+        self._visibility = self._lidar_ranges = None
+        self.observation.update(self)
+        if self.rewards is not None:
+            self.rewards.add(self.events)
+        if self.recorder is not None and self.winner is not Winner.tbd:
+            self.recorder.close()
+        return summary
+
+    def visibility(self) -> Visibility:
+        """Who sees whom, computed on first use after each step and shared by all callers."""
+        if self._visibility is None:
+            self._visibility = Visibility(self.robots)
+        return self._visibility
+
+    def lidar_ranges(self) -> np.ndarray:
+        """Lidar.default() scan of every robot, computed on first use after each step."""
+        if self._lidar_ranges is None:
+            self._lidar_ranges = Lidar.default().scan(self.robots)
+        return self._lidar_ranges
+
+    def snapshot(self) -> bytes:
+        bullets = self.bullets.state()
+        values = np.concatenate((
+            (self.teams[True].damage_taken, self.teams[False].damage_taken),
+            np.ravel([robot.state() for robot in self.robots]),
+            np.ravel([(zone.index, zone.is_activated) for zone in self.zones.values()]),
+            bullets.ravel()))
+        header = SNAPSHOT.header.pack(self.time_remaining, self.winner.value, len(bullets))
+        return header + self.random.state() + values.tobytes()
+
+    def restore(self, snapshot: bytes):
+        self.time_remaining, winner, bullet_count = SNAPSHOT.header.unpack_from(snapshot)
+        self.winner = Winner(winner)
+        self.random.load_state(snapshot[SNAPSHOT.header.size:SNAPSHOT.header.size + GAME_RANDOM.size])
+        values = np.frombuffer(snapshot, offset=SNAPSHOT.header.size + GAME_RANDOM.size)
+        fixed, bullets = values[:SNAPSHOT.fixed_size].tolist(), values[SNAPSHOT.fixed_size:]
+
+        self.teams[True].damage_taken, self.teams[False].damage_taken = number_from_state(fixed[0]), number_from_state(fixed[1])
+        robot_states = fixed[2:2 + 4 * len(ROBOT.state_fields)]
+        for index, robot in enumerate(self.robots):
+            robot.load_state(robot_states[index * len(ROBOT.state_fields):(index + 1) * len(ROBOT.state_fields)])
+        zone_states = fixed[2 + 4 * len(ROBOT.state_fields):]
+        for index, zone in enumerate(self.zones.values()):
+            zone.load_state(int(zone_states[2 * index]), bool(zone_states[2 * index + 1]))
+        self.bullets.load_state(bullets.reshape(bullet_count, SNAPSHOT.bullet_size))
+        self.robot_pairs.reset()
+        self.events.clear()
+        self._visibility = self._lidar_ranges = None
+        self.observation.update(self)
+
+    def clone(self) -> Game:
+        game = Game(seed=0)  # skips gathering entropy, the random state is restored below
+        game.collision_table = self.collision_table
+        game.restore(self.snapshot())
+        return game
+
+    def _step(self, commands: tuple[RobotCommand, ...], update_winner=True, observe=True):
+        # the rules of one step, step_n leaves the winner and observation updates to its own checks
+        stats = self.stats
+        if stats is not None:
+            stats.begin(self)
+        if self.recorder is not None:
+            self.recorder.record(self, commands)
+        if stats is not None:
+            stats.lap('record')
         if not self.time_remaining % (60 * UNITS.s):
             self._reset_zones()
-        for robot, command in zip(self.robots, (*blue_commands, *red_commands)):
-            robot.control(command)
+        if stats is not None:
+            stats.lap('zone_reset')
         robots = self.robots
-        for robot in robots:
-            robot.step(self.time_remaining, robots)
+        for robot, command in zip(robots, commands):
+            robot.control(command)
+        if stats is not None:
+            stats.lap('control')
+        nearby = self.robot_pairs.update(robots)
+        for index, robot in enumerate(robots):
+            if heat_damage := robot.step(self.time_remaining, nearby[index], self.collision_table):
+                self._emit_heat_damage(index, heat_damage)
+            if stats is not None:
+                stats.lap('robots')
             for zone in self.zones.values():
-                zone.apply(robot, self.teams)
-            if (bullet := robot.shoot()) is not None:
-                self.bullets.append(bullet)
-        for index, bullet in reversed(list(enumerate(self.bullets))):
-            if self._bullet_hits(bullet, bullet.step()):
-                del self.bullets[index]
+                if zone.apply(robot, self.teams):
+                    self._emit_zone_activated(index, zone)
+            if stats is not None:
+                stats.lap('zones')
+            if robot.shoot():
+                self.bullets.spawn(index, robot, self.random.bullet_spread())
+                if stats is not None:
+                    stats.counts['shots'] += 1
+            if stats is not None:
+                stats.lap('shoot')
+        self.bullets.step(robots, self.events)
+        if stats is not None:
+            stats.lap('bullets')
         self.time_remaining -= 1
-        self._update_winner()
+        if update_winner:
+            self._update_winner()
+        if stats is not None:
+            stats.lap('winner')
+        if observe:
+            self._visibility = self._lidar_ranges = None
+            self.observation.update(self)
+        if stats is not None:
+            stats.end(self)
+        if self.recorder is not None and self.winner is not Winner.tbd:
+            self.recorder.close()
 
-    def _bullet_hits(self, bullet: Bullet, trajectory: LineSegment):
-        return any([
-            not FIELD.outline.contains(bullet.center),
-            any(b.intersects(trajectory) for b in FIELD.high_barriers),
-            any(r.absorbs_bullet(trajectory) for r in self.robots if (r is not bullet.owner))
-        ])
+    def _emit_heat_damage(self, index: int, hp_lost: float):
+        self.events.emit(EventType.heat_damage, index, value=hp_lost)
+        if self.robots[index].hp <= 0:
+            self.events.emit(EventType.robot_killed, index)
+
+    def _emit_zone_activated(self, index: int, zone: Zone):
+        self.events.emit(EventType.zone_activated, index, detail=zone.type_.value)
+        if zone.type_ in (ZoneType.move_debuff, ZoneType.shoot_debuff):
+            self.events.emit(EventType.debuff_applied, index, detail=zone.type_.value, value=self.robots[index].debuff_timeout)
 
     def _update_winner(self):
+        previous_winner = self.winner
         blues_dead = all(r.hp == 0 for r in self.teams[True].robots.values())
         reds_dead = all(r.hp == 0 for r in self.teams[False].robots.values())
 
@@ -78,13 +248,11 @@ class Game:
             else:
                 self.winner = Winner.tied
 
+        if self.winner is not previous_winner:
+            for index, robot in enumerate(self.robots):
+                won = 0 if self.winner is Winner.tied else 1 if robot.team.is_blue == (self.winner is Winner.blue) else -1
+                self.events.emit(EventType.winner_decided, index, detail=self.winner.value, value=won)
+
     def _reset_zones(self):
-        positions = random.sample([0, 2, 4], k=3)  # randomly order F1/F2/F3 (0/2/4)
-        sides = random.choices([0, 1], k=3)  # randomly choose left/right (0/1) side of field
-        indices = []
-
-        for position, side in zip(positions, sides):
-            indices.append(position + side)
-            indices.append(position + 1 - side)
-        for index, zone in zip(indices, self.zones.values()):
+        for index, zone in zip(self.random.zone_layout(), self.zones.values()):
             zone.reset(index)
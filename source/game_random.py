@@ -0,0 +1,93 @@
+from __future__ import annotations
+import struct
+import typing
+import numpy as np
+from bullet import BULLET
+
+
+class GAME_RANDOM:
+    spread_block = 128  # bullet spreads drawn at once
+    zone_block = 4  # zone layouts drawn at once, a game uses 3
+    block_state = struct.Struct('<16s16sBI')  # PCG64 state and increment, buffered uint32
+    cursor = struct.Struct('<i')
+    stream_size = block_state.size + cursor.size
+    size = 2 * stream_size
+
+
+class RandomStream:
+    """
+    Rows drawn from a PCG64 generator a block at a time, on first use. The state is the generator state
+    at the start of the block plus the cursor, so restoring only redraws when the block changes.
+    """
+
+    def __init__(self, seed: np.random.SeedSequence, draw: typing.Callable[[np.random.Generator], np.ndarray]):
+        self._generator = np.random.Generator(np.random.PCG64(seed))
+        self._draw = draw
+        self._start_block()
+
+    def next(self) -> np.ndarray:
+        if self._block is None:
+            self._block = self._draw(self._generator)
+        row = self._block[self._cursor]
+        self._cursor += 1
+        if self._cursor == len(self._block):
+            self._start_block()
+        return row
+
+    def state(self) -> bytes:
+        return self._block_state + GAME_RANDOM.cursor.pack(self._cursor)
+
+    def load_state(self, blob: bytes):
+        block_state, (cursor,) = blob[:GAME_RANDOM.block_state.size], GAME_RANDOM.cursor.unpack_from(blob, GAME_RANDOM.block_state.size)
+        if block_state != self._block_state:
+            state, inc, has_uint32, uinteger = GAME_RANDOM.block_state.unpack(block_state)
+            self._generator.bit_generator.state = {
+                'bit_generator': 'PCG64',
+                'state': {'state': int.from_bytes(state, 'little'), 'inc': int.from_bytes(inc, 'little')},
+                'has_uint32': has_uint32, 'uinteger': uinteger}
+            self._block_state, self._block = block_state, None
+        self._cursor = cursor
+
+    def _start_block(self):
+        state = self._generator.bit_generator.state
+        self._block_state = GAME_RANDOM.block_state.pack(
+            state['state']['state'].to_bytes(16, 'little'), state['state']['inc'].to_bytes(16, 'little'),
+            state['has_uint32'], state['uinteger'])
+        self._block = None
+        self._cursor = 0
+
+
+class GameRandom:
+    """Seedable random source of one game, with separate streams for bullet spreads and zone layouts."""
+
+    def __init__(self, seed: int | np.random.SeedSequence | None = None):
+        seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        spread_seed, zone_seed = seed.spawn(2)
+        self._spreads = RandomStream(spread_seed, _draw_spreads)
+        self._zone_layouts = RandomStream(zone_seed, _draw_zone_layouts)
+
+    def bullet_spread(self) -> tuple[float, float]:
+        """Bullet speed along and across the gimbal direction."""
+        spread = self._spreads.next()
+        return spread.item(0), spread.item(1)
+
+    def zone_layout(self) -> list[int]:
+        """ZONE.outlines index of each zone, in ZoneType order."""
+        return self._zone_layouts.next().tolist()
+
+    def state(self) -> bytes:
+        return self._spreads.state() + self._zone_layouts.state()
+
+    def load_state(self, blob: bytes):
+        self._spreads.load_state(blob[:GAME_RANDOM.stream_size])
+        self._zone_layouts.load_state(blob[GAME_RANDOM.stream_size:GAME_RANDOM.size])
+
+
+def _draw_spreads(generator: np.random.Generator):
+    return generator.normal((BULLET.speed, 0.), (BULLET.sigma_x_speed, BULLET.sigma_y_speed), (GAME_RANDOM.spread_block, 2))
+
+
+def _draw_zone_layouts(generator: np.random.Generator):
+    positions = 2 * np.argsort(generator.random((GAME_RANDOM.zone_block, 3)), axis=1)  # randomly order F1/F2/F3 (0/2/4)
+    sides = generator.integers(0, 2, (GAME_RANDOM.zone_block, 3))  # randomly choose left/right (0/1) side of field
+    return np.stack((positions + sides, positions + 1 - sides), axis=-1).reshape(GAME_RANDOM.zone_block, 6)
@@ -1,8 +1,11 @@
 import math
 import typing
+import numpy as np
 
 
 class Vector:
+    __slots__ = 'x', 'y'
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
@@ -23,6 +26,10 @@ class Vector:
         shift = shift or Vector(0, 0)
         return (self - shift).transform(angle=-angle)
 
+    def set_transform(self, v: 'Vector', shift: 'Vector', sin: float, cos: float):  # in-place v.transform(shift, angle)
+        self.x = cos * v.x - sin * v.y + shift.x
+        self.y = sin * v.x + cos * v.y + shift.y
+
     def mirror(self, x=True, y=True):
         return Vector((-1 if x else 1) * self.x, (-1 if y else 1) * self.y)
 
@@ -46,6 +53,8 @@ class Vector:
 
 
 class LineSegment:
+    __slots__ = 'a', 'b'
+
     def __init__(self, a: Vector, b: Vector):
         self.a = a
         self.b = b
@@ -53,6 +62,10 @@ class LineSegment:
     def transform(self, shift=Vector(0, 0), angle=0.):
         return LineSegment(self.a.transform(shift, angle), self.b.transform(shift, angle))
 
+    def set_transform(self, s: 'LineSegment', shift: Vector, sin: float, cos: float):
+        self.a.set_transform(s.a, shift, sin, cos)
+        self.b.set_transform(s.b, shift, sin, cos)
+
     def inv_transform(self, shift=Vector(0, 0), angle=0.):
         return LineSegment(self.a.inv_transform(shift, angle), self.b.inv_transform(shift, angle))
 
@@ -65,6 +78,8 @@ class LineSegment:
 
 
 class Box:
+    __slots__ = 'dims', 'center', 'radius', 'l', 'r', 'b', 't', 'corners'
+
     def __init__(self, dims: Vector, center=Vector(0, 0)):
         self.dims = dims
         self.center = center
@@ -101,3 +116,66 @@ def y_mirrors(g: Geometry) -> tuple[Geometry, Geometry]:
 
 def mirrors(g: Geometry) -> tuple[Geometry, Geometry]:
     return g, g.mirror()
+
+
+def boxes_overlap(a_half_dims: Vector, a_rotation: float, b_half_dims: Vector, b_rotation: float, offset: Vector) -> bool:
+    """Separating axis test between two boxes around their centers, with the center of b `offset` from the center of a."""
+    a_sin, a_cos, b_sin, b_cos = math.sin(a_rotation), math.cos(a_rotation), math.sin(b_rotation), math.cos(b_rotation)
+    cos, sin = abs(a_cos * b_cos + a_sin * b_sin), abs(a_sin * b_cos - a_cos * b_sin)  # of the angle between the boxes
+    return all([
+        abs(offset.x * a_cos + offset.y * a_sin) < a_half_dims.x + b_half_dims.x * cos + b_half_dims.y * sin,
+        abs(offset.y * a_cos - offset.x * a_sin) < a_half_dims.y + b_half_dims.x * sin + b_half_dims.y * cos,
+        abs(offset.x * b_cos + offset.y * b_sin) < b_half_dims.x + a_half_dims.x * cos + a_half_dims.y * sin,
+        abs(offset.y * b_cos - offset.x * b_sin) < b_half_dims.y + a_half_dims.x * sin + a_half_dims.y * cos])
+
+
+def box_bounds(boxes: typing.Iterable[Box]) -> np.ndarray:
+    return np.array([(b.l, b.r, b.b, b.t) for b in boxes], dtype=float)
+
+
+def batch_transform(points: np.ndarray, shift: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    sin, cos = np.sin(angle), np.cos(angle)
+    x, y = points[..., 0], points[..., 1]
+    return np.stack((cos * x - sin * y, sin * x + cos * y), axis=-1) + shift
+
+
+def batch_inv_transform(points: np.ndarray, shift: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    return batch_transform(points - shift, 0., -angle)
+
+
+def batch_side_of(p: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.copysign(1., (a[..., 1] - p[..., 1]) * (b[..., 0] - p[..., 0]) - (b[..., 1] - p[..., 1]) * (a[..., 0] - p[..., 0]))
+
+
+def batch_segments_intersect(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray) -> np.ndarray:
+    return (batch_side_of(a, c, d) * batch_side_of(b, c, d) <= 0) & (batch_side_of(c, a, b) * batch_side_of(d, a, b) <= 0)
+
+
+def batch_box_contains(bounds: np.ndarray, p: np.ndarray) -> np.ndarray:
+    x, y = p[..., 0], p[..., 1]
+    return (bounds[..., 0] < x) & (x < bounds[..., 1]) & (bounds[..., 2] < y) & (y < bounds[..., 3])
+
+
+def batch_boxes_overlap(a_half_dims: np.ndarray, a_rotation: np.ndarray, b_half_dims: np.ndarray, b_rotation: np.ndarray,
+                        offset: np.ndarray) -> np.ndarray:
+    # same test as boxes_overlap, broadcast over half dims (..., 2), rotations (...) and offsets (..., 2)
+    a_sin, a_cos, b_sin, b_cos = np.sin(a_rotation), np.cos(a_rotation), np.sin(b_rotation), np.cos(b_rotation)
+    cos, sin = np.abs(a_cos * b_cos + a_sin * b_sin), np.abs(a_sin * b_cos - a_cos * b_sin)
+    ax, ay, bx, by = a_half_dims[..., 0], a_half_dims[..., 1], b_half_dims[..., 0], b_half_dims[..., 1]
+    x, y = offset[..., 0], offset[..., 1]
+    return (
+        (np.abs(x * a_cos + y * a_sin) < ax + bx * cos + by * sin) & (np.abs(y * a_cos - x * a_sin) < ay + bx * sin + by * cos) &
+        (np.abs(x * b_cos + y * b_sin) < bx + ax * cos + ay * sin) & (np.abs(y * b_cos - x * b_sin) < by + ax * sin + ay * cos))
+
+
+def batch_box_intersects(bounds: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # same rules as Box.intersects, broadcast over bounds (..., 4) = (l, r, b, t) and segments a -> b (..., 2)
+    l, r, bottom, t = bounds[..., 0], bounds[..., 1], bounds[..., 2], bounds[..., 3]
+    ax, ay, bx, by = a[..., 0], a[..., 1], b[..., 0], b[..., 1]
+    corner_sides = sum(
+        np.copysign(1., (ay - y) * (bx - x) - (by - y) * (ax - x)) for x in (l, r) for y in (bottom, t))
+    return ~(
+        ((ax < l) & (bx < l)) | ((r < ax) & (r < bx)) |
+        ((ay < bottom) & (by < bottom)) | ((t < ay) & (t < by)) |
+        (batch_box_contains(bounds, a) & batch_box_contains(bounds, b)) |
+        (np.abs(corner_sides) == 4))
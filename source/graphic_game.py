@@ -2,10 +2,10 @@ from __future__ import annotations
 import typing
 import pygame
 from shared import UNITS, UI, ASSETS, to_draw_coords
+from geometry import Vector
 from game import Game
 
 if typing.TYPE_CHECKING:
-    from bullet import Bullet
     from robot import Robot
 
 
@@ -17,6 +17,9 @@ class GRAPHIC_GAME:
 
     offset = (10, 10)
     screen_dims = (828, 638)
+    sprite_angle_step = 1 * UNITS.d  # robot sprites are drawn at the nearest cached rotation
+    sprite_angle_count = round(360 * UNITS.d / sprite_angle_step)
+    text_cache_size = 4096  # rendered labels kept before the cache starts over
 
 
 class GraphicGame(Game):
@@ -28,52 +31,83 @@ class GraphicGame(Game):
         pygame.display.set_icon(ASSETS.logo)
         pygame.font.init()
         self._font = pygame.font.SysFont(*UI.font)
+        self._sprites: dict[tuple[str, int], pygame.Surface] = {}  # rotated robot images by ASSETS name and angle step
+        self._background = ASSETS.background.convert()
+        self._bullet = ASSETS.bullet.convert_alpha()
+        self._zones = {type_: image.convert_alpha() for type_, image in ASSETS.zone.items()}
+        self._texts: dict[tuple[str, tuple[int, int, int]], pygame.Surface] = {}
+        self._hud: dict[tuple[float, float], tuple[str, tuple[int, int, int], pygame.Rect]] = {}  # label drawn at each HUD position
+        self._sprite_rects: list[pygame.Rect] = []  # where zones, robots and bullets were drawn, erased next frame
+        self._updated_rects: list[pygame.Rect] = []
+        self._redraw_all = True
 
-    def render(self):
+    def render(self, overlay: tuple[pygame.Surface, tuple[int, int]] = None):
+        """Draws the frame and pushes the changed regions to the display. An overlay is drawn on top for this frame only."""
+        redraw_all = self._redraw_all
         self._blit()
-        pygame.display.flip()
+        if overlay is not None:
+            self._screen.blit(*overlay)
+            self._redraw_all = redraw_all = True
+        if redraw_all:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._updated_rects)
 
     def _blit(self):
-        self._screen.blit(ASSETS.background, (0, 0))
+        # sprites are erased with the background and drawn again, HUD labels only when their text changes
+        if self._redraw_all:
+            self._screen.blit(self._background, (0, 0))
+            self._hud.clear()
+            self._updated_rects = []
+            self._redraw_all = False
+        else:
+            for rect in self._sprite_rects:
+                self._screen.blit(self._background, rect, rect)
+            self._updated_rects = self._sprite_rects
+        self._sprite_rects = []
+
         self._blit_zones()
         for robot in self.robots:
             self._blit_robot(robot)
-        for bullet in self.bullets:
-            self._blit_bullet(bullet)
+        for x, y in self.bullets.centers[self.bullets.alive]:
+            self._blit_bullet(Vector(x, y))
         self._blit_text(f'{self.time_remaining / UNITS.s:.1f}', GRAPHIC_GAME.info_coords[0])
         self._blit_text(self.teams[False].damage_taken, GRAPHIC_GAME.info_coords[1])
         self._blit_text(self.teams[True].damage_taken, GRAPHIC_GAME.info_coords[2])
         self._blit_text(self.winner.name, GRAPHIC_GAME.info_coords[3])
+        self._updated_rects.extend(self._sprite_rects)
+
+    def _blit_sprite(self, image: pygame.Surface, center: tuple[float, float]):
+        self._sprite_rects.append(self._screen.blit(image, image.get_rect(center=center)))
 
     def _blit_zones(self):
         for zone in self.zones.values():
-            if zone.is_activated:
+            if zone.is_activated or zone.outline is None:  # zones are placed by the first step
                 continue
-            image = ASSETS.zone[zone.type_]
-            rect = image.get_rect()
-            rect.center = to_draw_coords(zone.outline.center, offset=GRAPHIC_GAME.offset)
-            self._screen.blit(image, rect)
+            self._blit_sprite(self._zones[zone.type_], to_draw_coords(zone.outline.center, offset=GRAPHIC_GAME.offset))
 
     def _blit_robot(self, robot: Robot):
         if not robot.hp:
-            chassis_image = ASSETS.dead_robot
+            chassis_name = 'dead_robot'
         elif robot.team.is_blue:
-            chassis_image = ASSETS.blue_robot
+            chassis_name = 'blue_robot'
         else:
-            chassis_image = ASSETS.red_robot
-        chassis_image = pygame.transform.rotate(chassis_image, robot.rotation / UNITS.d)
-        gimbal_image = pygame.transform.rotate(ASSETS.gimbal, (robot.gimbal_yaw + robot.rotation) / UNITS.d)
-        chassis_rect = chassis_image.get_rect()
-        gimbal_rect = gimbal_image.get_rect()
-        chassis_rect.center = gimbal_rect.center = to_draw_coords(robot.center, offset=GRAPHIC_GAME.offset)
-        self._screen.blit(chassis_image, chassis_rect)
-        self._screen.blit(gimbal_image, gimbal_rect)
-        self._blit_text(
-            f'{(1 if robot.is_one else 2) + (0 if robot.team.is_blue else 2)} | {robot.hp}',
-            to_draw_coords(robot.center, offset=GRAPHIC_GAME.robot_label_offset),
-            UI.blue if robot.team.is_blue else UI.red)
+            chassis_name = 'red_robot'
+        center = to_draw_coords(robot.center, offset=GRAPHIC_GAME.offset)
+        self._blit_sprite(self._rotated(chassis_name, robot.rotation), center)
+        self._blit_sprite(self._rotated('gimbal', robot.gimbal_yaw + robot.rotation), center)
+        label = self._text(
+            f'{(1 if robot.is_one else 2) + (0 if robot.team.is_blue else 2)} | {robot.hp}', UI.blue if robot.team.is_blue else UI.red)
+        self._sprite_rects.append(self._screen.blit(label, to_draw_coords(robot.center, offset=GRAPHIC_GAME.robot_label_offset)))
         self._blit_robot_status(robot)
 
+    def _rotated(self, name: str, angle: float) -> pygame.Surface:
+        key = name, round(angle / GRAPHIC_GAME.sprite_angle_step) % GRAPHIC_GAME.sprite_angle_count
+        if (image := self._sprites.get(key)) is None:
+            image = pygame.transform.rotate(getattr(ASSETS, name), key[1] * GRAPHIC_GAME.sprite_angle_step / UNITS.d)
+            image = self._sprites[key] = image.convert_alpha()  # in the display format, so blits skip a per-pixel conversion
+        return image
+
     def _blit_robot_status(self, robot: Robot):
         row_coords = GRAPHIC_GAME.state_coords[robot.is_one + 2 * robot.team.is_blue]
         self._blit_text(f'{robot.center.x / UNITS.m:.2f}', row_coords[0])
@@ -95,11 +129,24 @@ class GraphicGame(Game):
         self._blit_text(f'{robot.can_shoot}', row_coords[16])
         self._blit_text(f'{robot.debuff_timeout / UNITS.s:.0f}', row_coords[17])
 
-    def _blit_bullet(self, bullet: Bullet):
-        bullet_rect = ASSETS.bullet.get_rect()
-        bullet_rect.center = to_draw_coords(bullet.center, offset=GRAPHIC_GAME.offset)
-        self._screen.blit(ASSETS.bullet, bullet_rect)
+    def _blit_bullet(self, center: Vector):
+        self._blit_sprite(self._bullet, to_draw_coords(center, offset=GRAPHIC_GAME.offset))
 
     def _blit_text(self, text: str, position: tuple[float, float], color=UI.black):
-        label = self._font.render(str(text), True, color)
-        self._screen.blit(label, position)
+        text = str(text)
+        drawn = self._hud.get(position)
+        if drawn is not None:
+            if drawn[:2] == (text, color):
+                return
+            self._screen.blit(self._background, drawn[2], drawn[2])
+            self._updated_rects.append(drawn[2])
+        rect = self._screen.blit(self._text(text, color), position)
+        self._updated_rects.append(rect)
+        self._hud[position] = text, color, rect
+
+    def _text(self, text: str, color: tuple[int, int, int]) -> pygame.Surface:
+        if (label := self._texts.get((text, color))) is None:
+            if len(self._texts) >= GRAPHIC_GAME.text_cache_size:
+                self._texts.clear()
+            label = self._texts[text, color] = self._font.render(text, True, color)
+        return label
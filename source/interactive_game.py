@@ -1,31 +1,65 @@
+import dataclasses
+import threading
+import time
 import pygame
 from graphic_game import GraphicGame
-from shared import ASSETS
+from shared import UNITS, ASSETS
 from robot import RobotCommand, ROBOT
+from recorder import Recorder
 
 
 class INTERACTIVE_GAME:
-    delay = 18
-    short_delay = 0
+    frame_rate = 60  # [frame/s], independent of the simulation rate
+    fast_speed = 10.  # times real time while shift is held
+    max_lag = 0.25  # [s] of steps caught up at most when the simulation falls behind
     guide_coords = (134, 114)
 
 
 class InteractiveGame:
-    def __init__(self):
+    """
+    Steps the game on its own thread at `speed` times real time, UNITS.s steps per second at speed 1.
+    The main thread reads input and draws the latest state at INTERACTIVE_GAME.frame_rate.
+    """
+
+    def __init__(self, record: bool = False, speed: float = 1.):
         self._game = GraphicGame()
+        if record:
+            self._game.recorder = Recorder()
+        self._speed = speed
         self._selected_index = 0
         self._speed_up = False
         self._view_guide = False
+        self._commands = (RobotCommand(), RobotCommand()), (RobotCommand(), RobotCommand())
+        self._lock = threading.Lock()  # held while stepping or drawing
+        self._running = True
         self._run()
 
     def _run(self):
+        simulation = threading.Thread(target=self._simulate, daemon=True)
+        simulation.start()
+        clock = pygame.time.Clock()
         while (commands := self._receive_commands()) is not None:
-            self._game.step(*commands)
-            self._game._blit()
-            if self._view_guide:
-                self._game._screen.blit(ASSETS.guide, INTERACTIVE_GAME.guide_coords)  # this is not good
-            pygame.display.flip()
-            pygame.time.wait(INTERACTIVE_GAME.short_delay if self._speed_up else INTERACTIVE_GAME.delay)
+            self._commands = commands
+            with self._lock:
+                self._game.render((ASSETS.guide, INTERACTIVE_GAME.guide_coords) if self._view_guide else None)
+            clock.tick(INTERACTIVE_GAME.frame_rate)
+        self._running = False
+        simulation.join()
+        if self._game.recorder is not None:
+            self._game.recorder.close()
+
+    def _simulate(self):
+        step_time = time.perf_counter()
+        while self._running:
+            # copied since Robot.control edits commands, which are reused until the next frame reads input
+            commands = [dataclasses.replace(command) for team in self._commands for command in team]
+            with self._lock:
+                self._game.step(commands[0:2], commands[2:4])
+            now = time.perf_counter()
+            step_time = max(step_time + 1 / (UNITS.s * (INTERACTIVE_GAME.fast_speed if self._speed_up else self._speed)),
+                            now - INTERACTIVE_GAME.max_lag)
+            if step_time > now:
+                time.sleep(step_time - now)
 
     def _receive_commands(self):
         pressed = pygame.key.get_pressed()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import functools
+import math
+import typing
+import numpy as np
+from shared import FIELD
+from geometry import box_bounds
+from robot import ROBOT
+
+if typing.TYPE_CHECKING:
+    from robot import Robot
+
+
+class LIDAR:  # scans run in float32, which keeps the (robot, ray, box) arrays small enough to stay fast
+    ray_count = 360
+    static_bounds = box_bounds([*FIELD.barriers, FIELD.outline]).astype(np.float32)  # rays leave through the last one
+    robot_bounds = box_bounds([ROBOT.outline])[0].astype(np.float32)
+
+
+class Lidar:
+    """
+    2D lidar at the center of each robot, with `ray_count` rays spread evenly around the chassis direction
+    starting straight ahead and turning counterclockwise. A ray stops at the field outline, any barrier or
+    the outline of another robot. All rays of all robots are cast in one pass with the slab test.
+    """
+
+    def __init__(self, ray_count: int = LIDAR.ray_count):
+        angles = 2 * math.pi * np.arange(ray_count) / ray_count
+        self.cos, self.sin = np.cos(angles).astype(np.float32), np.sin(angles).astype(np.float32)
+        self._others = ~np.eye(4, dtype=bool)[..., None]  # (other robot, robot, 1)
+
+    @classmethod
+    @functools.cache
+    def default(cls) -> Lidar:
+        return cls()
+
+    def scan(self, robots: tuple[Robot, Robot, Robot, Robot]) -> np.ndarray:
+        """Range of every ray in [pixel], float32 of shape (4, ray_count) in Game.robots order."""
+        centers = np.array([(r.center.x, r.center.y) for r in robots], dtype=np.float32)
+        rotations = np.array([r.rotation for r in robots], dtype=np.float32)
+        robot_cos, robot_sin = np.cos(rotations)[:, None], np.sin(rotations)[:, None]
+        x_directions = robot_cos * self.cos - robot_sin * self.sin  # (robot, ray)
+        y_directions = robot_sin * self.cos + robot_cos * self.sin
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_inverses, y_inverses = 1 / x_directions, 1 / y_directions
+            near, far = _slabs(LIDAR.static_bounds[:, None, None], centers[:, 0, None], centers[:, 1, None], x_inverses, y_inverses)
+            ranges = np.fmin(far[-1], _hits(near[:-1], far[:-1]).min(axis=0))
+
+            # other robots are tested in their own frame, where the outline is an axis aligned box around the origin
+            offsets = centers[None] - centers[:, None]  # (other robot, robot, 2)
+            other_cos, other_sin = robot_cos[..., None], robot_sin[..., None]
+            local_x = other_cos[..., 0] * offsets[..., 0] + other_sin[..., 0] * offsets[..., 1]
+            local_y = -other_sin[..., 0] * offsets[..., 0] + other_cos[..., 0] * offsets[..., 1]
+            local_x_directions = other_cos * x_directions + other_sin * y_directions  # (other robot, robot, ray)
+            local_y_directions = -other_sin * x_directions + other_cos * y_directions
+            robot_hits = _hits(*_slabs(
+                LIDAR.robot_bounds, local_x[..., None], local_y[..., None], 1 / local_x_directions, 1 / local_y_directions))
+            ranges = np.fmin(ranges, np.where(self._others, robot_hits, np.float32(np.inf)).min(axis=0))
+        return ranges
+
+
+def _slabs(bounds: np.ndarray, x: np.ndarray, y: np.ndarray, x_inverses: np.ndarray, y_inverses: np.ndarray):
+    # distances along each ray where it enters and leaves the boxes, NaN from rays parallel to a box side are skipped
+    x_near, x_far = (bounds[..., 0] - x) * x_inverses, (bounds[..., 1] - x) * x_inverses
+    y_near, y_far = (bounds[..., 2] - y) * y_inverses, (bounds[..., 3] - y) * y_inverses
+    near = np.fmax(np.fmin(x_near, x_far), np.fmin(y_near, y_far))
+    far = np.fmin(np.fmax(x_near, x_far), np.fmax(y_near, y_far))
+    return near, far
+
+
+def _hits(near: np.ndarray, far: np.ndarray):
+    near = np.fmax(near, np.float32(0.))
+    return np.where(far >= near, near, np.float32(np.inf))
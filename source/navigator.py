@@ -1,26 +1,99 @@
-import pathlib
-import networkx
+from __future__ import annotations
+import functools
+import heapq
 import json
+import numpy as np
+from shared import ASSETS
+
+
+class NAVIGATOR:
+    cache_size = 4096  # masked queries kept per navigator
 
 
 class Navigator:
-    def __init__(self, file_name: str = DATA_FILE_PATH):
+    """
+    Shortest paths over the navigation graph. Distances and next hops between all node pairs are computed
+    once, so plain queries only walk the next hop table. Queries that avoid nodes run Dijkstra over the
+    adjacency lists with the avoided nodes skipped and are cached on (from, to, avoided nodes).
+    Edge weights are the distances between node coordinates.
+    """
+
+    def __init__(self, file_name: str = ASSETS.navigation_file):
         with open(file_name, 'r') as file:
             data = json.load(file)
-        self.nodes, edges, adjacency_matrix = data['nodes'], data['edges'], data['adjacency_matrix']
-        self.graph = networkx.Graph()
-        for n1, n2 in edges:
-            self.graph.add_edge(n1, n2, weight=adjacency_matrix[n1][n2])
-
-    def navigate(self, from_node: int, to_node: int, avoid_nodes=None):
-        if avoid_nodes is None:
-            networkx.shortest_path(self.graph, from_node, to_node, weight='weight')
-        elif (from_node in avoid_nodes) or (to_node in avoid_nodes):
+        self.nodes = np.array(data['nodes'])
+        self.edges = [tuple(edge) for edge in data['edges']]
+        self.neighbours: list[list[tuple[int, float]]] = [[] for _ in self.nodes]
+        for n1, n2 in self.edges:
+            weight = float(np.linalg.norm(self.nodes[n1] - self.nodes[n2]))
+            self.neighbours[n1].append((n2, weight))
+            self.neighbours[n2].append((n1, weight))
+        self.distances, self.next_hops = self._all_pairs()
+        self._path = functools.lru_cache(maxsize=None)(self._follow_next_hops)
+        self._masked_path = functools.lru_cache(maxsize=NAVIGATOR.cache_size)(self._dijkstra)
+
+    def navigate(self, from_node: int, to_node: int, avoid_nodes=None) -> tuple[int, ...] | None:
+        """Nodes along the shortest path, both ends included, or None when avoid_nodes cut the way."""
+        path = self._path(from_node, to_node)
+        if not avoid_nodes or path is None:
+            return path
+        avoid_nodes = frozenset(avoid_nodes)
+        if avoid_nodes.isdisjoint(path):
+            return path
+        if (from_node in avoid_nodes) or (to_node in avoid_nodes):
             return None
-        graph = self.graph.copy()
-        for node in avoid_nodes:
-            graph.remove_node(node)
-        try:
-            return networkx.shortest_path(graph, from_node, to_node, weight='weight')
-        except networkx.exception.NetworkXNoPath:
+        return self._masked_path(from_node, to_node, avoid_nodes)
+
+    def distance(self, from_node: int, to_node: int) -> float:
+        return self.distances[from_node, to_node]
+
+    def nearest_nodes(self, positions: np.ndarray) -> np.ndarray:
+        """Index of the node closest to each position, for positions of shape (..., 2)."""
+        return np.argmin(((positions[..., None, :] - self.nodes) ** 2).sum(axis=-1), axis=-1)
+
+    def _follow_next_hops(self, from_node: int, to_node: int):
+        if self.next_hops[from_node, to_node] < 0:
             return None
+        path = [from_node]
+        while path[-1] != to_node:
+            path.append(int(self.next_hops[path[-1], to_node]))
+        return tuple(path)
+
+    def _all_pairs(self):
+        # Floyd-Warshall over the weight matrix, next_hops[i, j] is the node after i on the way to j
+        count = len(self.nodes)
+        distances = np.full((count, count), np.inf)
+        next_hops = np.full((count, count), -1)
+        np.fill_diagonal(distances, 0.)
+        np.fill_diagonal(next_hops, np.arange(count))
+        for node, neighbours in enumerate(self.neighbours):
+            for neighbour, weight in neighbours:
+                distances[node, neighbour] = weight
+                next_hops[node, neighbour] = neighbour
+        for via in range(count):
+            through = distances[:, via, None] + distances[via]
+            shorter = through < distances
+            distances[shorter] = through[shorter]
+            next_hops[shorter] = np.broadcast_to(next_hops[:, via, None], shorter.shape)[shorter]
+        return distances, next_hops
+
+    def _dijkstra(self, from_node: int, to_node: int, avoid_nodes: frozenset[int]):
+        distances = {from_node: 0.}
+        previous = {}
+        queue = [(0., from_node)]
+        while queue:
+            distance, node = heapq.heappop(queue)
+            if node == to_node:
+                path = [to_node]
+                while path[-1] != from_node:
+                    path.append(previous[path[-1]])
+                return tuple(reversed(path))
+            if distance > distances[node]:
+                continue
+            for neighbour, weight in self.neighbours[node]:
+                if neighbour in avoid_nodes or distance + weight >= distances.get(neighbour, np.inf):
+                    continue
+                distances[neighbour] = distance + weight
+                previous[neighbour] = node
+                heapq.heappush(queue, (distance + weight, neighbour))
+        return None
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import typing
+import numpy as np
+from shared import ZoneType
+from robot import ROBOT
+
+if typing.TYPE_CHECKING:
+    from game import Game
+
+
+class OBSERVATION:
+    robot_fields = ROBOT.state_fields
+    zone_fields = ('index', 'x', 'y', 'is_activated')  # index into ZONE.outlines, -1 before the first reset
+    bullet_fields = ('x', 'y', 'x_speed', 'y_speed', 'owner', 'alive')
+    info_fields = ('time_remaining', 'winner', 'blue_damage_taken', 'red_damage_taken')
+
+    bullet_capacity = 64  # bullets beyond this many are left out
+    shapes = {
+        'robots': (4, len(robot_fields)),
+        'zones': (len(ZoneType), len(zone_fields)),
+        'bullets': (bullet_capacity, len(bullet_fields)),
+        'info': (len(info_fields),)
+    }
+    size = sum(int(np.prod(shape)) for shape in shapes.values())
+
+
+class Observation:
+    """
+    Fixed-layout float32 view of a game, updated in place after every step. `array` holds the whole state,
+    and `robots`, `zones`, `bullets` and `info` are views into it laid out as the OBSERVATION fields.
+    """
+
+    def __init__(self):
+        self.array = np.zeros(OBSERVATION.size, dtype=np.float32)
+        views, start = {}, 0
+        for name, shape in OBSERVATION.shapes.items():
+            stop = start + int(np.prod(shape))
+            views[name] = self.array[start:stop].reshape(shape)
+            start = stop
+        self.robots, self.zones, self.bullets, self.info = views['robots'], views['zones'], views['bullets'], views['info']
+        self._bullet_count = 0
+
+    def update(self, game: Game):
+        self.robots[:] = [robot.state() for robot in game.robots]
+        self.zones[:] = [
+            (-1, 0., 0., zone.is_activated) if zone.outline is None else
+            (zone.index, zone.outline.center.x, zone.outline.center.y, zone.is_activated) for zone in game.zones.values()]
+        self.info[:] = game.time_remaining, game.winner.value, game.teams[True].damage_taken, game.teams[False].damage_taken
+
+        bullets = game.bullets
+        if not (len(bullets) or self._bullet_count):
+            return
+        slots = np.flatnonzero(bullets.alive)[:OBSERVATION.bullet_capacity]
+        self.bullets[:len(slots), 0:2] = bullets.centers[slots]
+        self.bullets[:len(slots), 2:4] = bullets.speeds[slots]
+        self.bullets[:len(slots), 4] = bullets.owners[slots]
+        self.bullets[:len(slots), 5] = 1.
+        self.bullets[len(slots):self._bullet_count] = 0.
+        self._bullet_count = len(slots)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import typing
+import numpy as np
+import pygame
+from shared import UNITS, FIELD, ASSETS, to_draw_coords
+from geometry import Vector
+from graphic_game import GRAPHIC_GAME
+
+if typing.TYPE_CHECKING:
+    from game import Game
+
+
+class OFFSCREEN_RENDERER:
+    size = (202, 112)  # [pixel] width and height of a frame, a quarter of the field image
+
+
+class OffscreenRenderer:
+    """
+    Draws the field, zones, robots and bullets of any number of games without a window, into one uint8 array
+    of shape (N, height, width, 3). Images are scaled to the frame size once, and each frame is drawn straight
+    into its slice of the array through a surface sharing its memory, so no display or copy is needed.
+    """
+
+    def __init__(self, size: tuple[int, int] = OFFSCREEN_RENDERER.size):
+        self.size = size
+        self._scale = size[0] / FIELD.outline.dims.x, size[1] / FIELD.outline.dims.y
+        self._field = pygame.transform.smoothscale(ASSETS.field, size)
+        self._bullet = self._scaled(ASSETS.bullet)
+        self._zones = {type_: self._scaled(image) for type_, image in ASSETS.zone.items()}
+        self._sprites: dict[tuple[str, int], pygame.Surface] = {}  # rotated and scaled robot images by ASSETS name and angle step
+        self._frames = np.empty((0, size[1], size[0], 3), dtype=np.uint8)
+        self._surfaces: list[pygame.Surface] = []
+
+    def render(self, games: typing.Sequence[Game]) -> np.ndarray:
+        """Frames of `games` in RGB. The array is reused, so the next call overwrites it."""
+        if len(games) != len(self._frames):
+            self._frames = np.empty((len(games), self.size[1], self.size[0], 3), dtype=np.uint8)
+            self._surfaces = [pygame.image.frombuffer(frame, self.size, 'RGB') for frame in self._frames]
+        for game, surface in zip(games, self._surfaces):
+            self._draw(game, surface)
+        return self._frames
+
+    def _draw(self, game: Game, surface: pygame.Surface):
+        surface.blit(self._field, (0, 0))
+        for zone in game.zones.values():
+            if not (zone.is_activated or zone.outline is None):
+                self._blit(surface, self._zones[zone.type_], zone.outline.center)
+        for robot in game.robots:
+            if not robot.hp:
+                chassis_name = 'dead_robot'
+            elif robot.team.is_blue:
+                chassis_name = 'blue_robot'
+            else:
+                chassis_name = 'red_robot'
+            self._blit(surface, self._rotated(chassis_name, robot.rotation), robot.center)
+            self._blit(surface, self._rotated('gimbal', robot.gimbal_yaw + robot.rotation), robot.center)
+        for x, y in game.bullets.centers[game.bullets.alive]:
+            self._blit(surface, self._bullet, Vector(x, y))
+
+    def _blit(self, surface: pygame.Surface, image: pygame.Surface, center: Vector):
+        x, y = to_draw_coords(center)
+        surface.blit(image, image.get_rect(center=(x * self._scale[0], y * self._scale[1])))
+
+    def _rotated(self, name: str, angle: float) -> pygame.Surface:
+        key = name, round(angle / GRAPHIC_GAME.sprite_angle_step) % GRAPHIC_GAME.sprite_angle_count
+        if (image := self._sprites.get(key)) is None:
+            image = self._sprites[key] = self._scaled(
+                pygame.transform.rotate(getattr(ASSETS, name), key[1] * GRAPHIC_GAME.sprite_angle_step / UNITS.d))
+        return image
+
+    def _scaled(self, image: pygame.Surface) -> pygame.Surface:
+        width, height = image.get_size()
+        return pygame.transform.smoothscale(
+            image, (max(round(width * self._scale[0]), 1), max(round(height * self._scale[1]), 1)))
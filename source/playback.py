@@ -0,0 +1,54 @@
+import sys
+import pygame
+from graphic_game import GraphicGame
+from recorder import Record, RECORDER
+from shared import UNITS, RECORDS_DIR
+
+
+class PLAYBACK:
+    delay = 18
+    scrub_steps = UNITS.s // 5  # steps per frame while an arrow key is held
+    fast_scrub_steps = 2 * UNITS.s  # with shift held
+
+
+class Playback:
+    """Plays a recording in a GraphicGame. Space pauses, arrows scrub (faster with shift), home and end jump."""
+
+    def __init__(self, path):
+        self._record = Record(path)
+        self._game = GraphicGame()
+        self._step = None
+        self._playing = True
+        self._run()
+
+    def _run(self):
+        step = 0
+        while step is not None:
+            if step != self._step:
+                self._record.seek(self._game, step, self._step)
+                self._step = step
+            self._game.render()
+            pygame.time.wait(PLAYBACK.delay)
+            step = self._receive_step()
+
+    def _receive_step(self):
+        pressed = pygame.key.get_pressed()
+        for event in pygame.event.get():
+            if (event.type == pygame.QUIT) or pressed[pygame.K_ESCAPE]:
+                return
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                self._playing = not self._playing
+
+        scrub_steps = PLAYBACK.fast_scrub_steps if pressed[pygame.K_LSHIFT] else PLAYBACK.scrub_steps
+        step = self._step + scrub_steps * (pressed[pygame.K_RIGHT] - pressed[pygame.K_LEFT])
+        if pressed[pygame.K_HOME]:
+            step = 0
+        elif pressed[pygame.K_END]:
+            step = self._record.step_count
+        elif self._playing and step == self._step:
+            step += 1
+        return min(max(step, 0), self._record.step_count)
+
+
+if __name__ == '__main__':
+    Playback(sys.argv[1] if len(sys.argv) > 1 else max(RECORDS_DIR.glob(f'*{RECORDER.suffix}')))
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import struct
+import time
+import pathlib
+import typing
+import numpy as np
+from shared import RECORDS_DIR
+from robot import RobotCommand
+
+if typing.TYPE_CHECKING:
+    from game import Game
+
+
+class RECORDER:
+    magic = b'SIMREC01'
+    header = struct.Struct('<8sIIII')  # magic, step count, keyframe interval, keyframe count, command row count
+    keyframe_interval = 100  # steps between Game snapshots
+    suffix = '.rec'
+    alignment = 8
+
+
+class Recorder:
+    """
+    Records a game into `path` as columns: Game.snapshot keyframes every `keyframe_interval` steps, then one
+    command byte per step and one float64 row per command that changed. Bits 0-3 of the command byte mark
+    which robots got a new command row, bits 4-7 hold their shoot flags. The game is deterministic from a
+    snapshot, so the steps between keyframes are rebuilt by replaying their commands. Keyframe steps store
+    all four commands so every keyframe replays on its own. The file is written by close, which Game.step
+    calls once the game has a winner.
+    """
+
+    def __init__(self, path: pathlib.Path | str | None = None, keyframe_interval: int = RECORDER.keyframe_interval):
+        self.path = pathlib.Path(path) if path else RECORDS_DIR / time.strftime(f'%Y%m%d-%H%M%S{RECORDER.suffix}')
+        self.keyframe_interval = keyframe_interval
+        self._keyframes: list[bytes] = []
+        self._command_bytes = bytearray()
+        self._command_rows: list[tuple[float, float, float, float]] = []
+        self._last_rows: list[tuple[float, float, float, float] | None] = [None] * 4  # values, Robot.control edits commands in place
+        self.closed = False
+
+    def __len__(self):
+        return len(self._command_bytes)
+
+    def record(self, game: Game, commands: typing.Sequence[RobotCommand]):
+        """Called by Game.step before the commands are applied. Steps after close are not kept."""
+        if self.closed:
+            return
+        is_keyframe = not len(self) % self.keyframe_interval
+        if is_keyframe:
+            self._keyframes.append(game.snapshot())
+        command_byte = 0
+        for index, command in enumerate(commands):
+            command_byte |= bool(command.shoot) << (4 + index)
+            row = command.x_speed, command.y_speed, command.rotation_speed, command.gimbal_yaw_speed
+            if is_keyframe or row != self._last_rows[index]:
+                command_byte |= 1 << index
+                self._command_rows.append(row)
+                self._last_rows[index] = row
+        self._command_bytes.append(command_byte)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        keyframe_offsets = np.cumsum([0, *map(len, self._keyframes)], dtype=np.uint64)
+        columns = [
+            keyframe_offsets.tobytes(), b''.join(self._keyframes), bytes(self._command_bytes),
+            np.array(self._command_rows, dtype=np.float64).tobytes()]
+        with open(self.path, 'wb') as file:
+            file.write(RECORDER.header.pack(
+                RECORDER.magic, len(self), self.keyframe_interval, len(self._keyframes), len(self._command_rows)))
+            for column in columns:
+                file.write(column)
+                file.write(bytes(-len(column) % RECORDER.alignment))
+
+
+class Record:
+    """Memory-mapped recording written by Recorder. Step i is the state after i steps of the game."""
+
+    def __init__(self, path: pathlib.Path | str):
+        self.path = pathlib.Path(path)
+        self._data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        magic, self.step_count, self.keyframe_interval, keyframe_count, row_count = RECORDER.header.unpack_from(self._data)
+        assert magic == RECORDER.magic, f'{self.path} is not a recording'
+
+        offset = RECORDER.header.size
+        def column(size: int):
+            nonlocal offset
+            start, offset = offset, offset + size + -size % RECORDER.alignment
+            return self._data[start:start + size]
+
+        self._keyframe_offsets = column(8 * (keyframe_count + 1)).view(np.uint64)
+        self._keyframes = column(int(self._keyframe_offsets[-1]))
+        self._command_bytes = column(self.step_count)
+        self._command_rows = column(8 * 4 * row_count).view(np.float64).reshape(row_count, 4)
+        changed = np.unpackbits(self._command_bytes[:, None], axis=1, bitorder='little')[:, :4].astype(bool)
+        row_ids = np.where(changed, np.cumsum(changed.ravel()).reshape(changed.shape) - 1, -1)
+        self._latest_rows = np.maximum.accumulate(row_ids, axis=0)  # command row in effect for each step and robot
+
+    def __len__(self):
+        return self.step_count + 1
+
+    def keyframe(self, index: int) -> bytes:
+        return bytes(self._keyframes[int(self._keyframe_offsets[index]):int(self._keyframe_offsets[index + 1])])
+
+    def commands(self, step: int) -> list[RobotCommand]:
+        """Commands applied at `step`, blue one, blue two, red one, red two."""
+        command_byte = int(self._command_bytes[step])
+        return [
+            RobotCommand(*self._command_rows[row].tolist(), shoot=bool(command_byte >> (4 + index) & 1))
+            for index, row in enumerate(self._latest_rows[step].tolist())]
+
+    def seek(self, game: Game, step: int, current_step: int | None = None):
+        """
+        Loads `step` into `game` from the keyframe before it. When `game` already shows `current_step` of
+        this record and that lies between the keyframe and `step`, the replay continues from there instead.
+        """
+        assert 0 <= step <= self.step_count, f'step {step} outside 0..{self.step_count}'
+        keyframe = min(step // self.keyframe_interval, len(self._keyframe_offsets) - 2)
+        start = keyframe * self.keyframe_interval
+        if current_step is None or not start <= current_step <= step:
+            game.restore(self.keyframe(keyframe))
+            current_step = start
+        for replayed in range(current_step, step):
+            commands = self.commands(replayed)
+            game.step(commands[0:2], commands[2:4])
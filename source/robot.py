@@ -3,12 +3,14 @@ import functools
 import dataclasses
 import typing
 import math
-from shared import UNITS, FIELD, limit_magnitude
-from geometry import Vector, LineSegment, Box, x_mirrors, y_mirrors
-from bullet import Bullet, BULLET
+from shared import UNITS, FIELD, limit_magnitude, number_from_state
+from geometry import Vector, LineSegment, Box, x_mirrors, y_mirrors, boxes_overlap
+from bullet import BULLET
+from collision_table import COLLISION_TABLE
 
 if typing.TYPE_CHECKING:
     from team import Team
+    from collision_table import CollisionTable
 
 
 @dataclasses.dataclass
@@ -35,6 +37,7 @@ class MotionConfig:
 
 class ROBOT:
     outline = Box(Vector(0.6 * UNITS.m, 0.5 * UNITS.m))
+    half_dims = outline.dims / 2
 
     _armor_length = 0.14 * UNITS.m
     armor_lines = [
@@ -55,8 +58,17 @@ class ROBOT:
     rebound_coeff = 0.4
     shot_cooldown = 0.1 * UNITS.s
 
+    state_fields = (  # as listed in GraphicGame._blit_robot_status
+        'x', 'y', 'rotation', 'gimbal_yaw', 'x_speed', 'y_speed', 'rotation_speed', 'gimbal_yaw_speed', 'ammo', 'heat', 'hp',
+        'is_shooting', 'shot_cooldown', 'barrier_hits', 'robot_hits', 'can_move', 'can_shoot', 'debuff_timeout')
+
 
 class Robot:
+    __slots__ = (
+        'is_one', 'team', 'center', 'rotation', 'gimbal_yaw', 'speed', 'rotation_speed', 'gimbal_yaw_speed',
+        'ammo', 'is_shooting', 'shot_cooldown', 'heat', 'hp', 'barrier_hits', 'robot_hits', 'can_move', 'can_shoot',
+        'debuff_timeout', 'collision_tests', '_sin', '_cos', '_corners', '_armor_lines')
+
     def __init__(self, is_one: bool, team: Team):
         self.is_one = is_one
         self.team = team
@@ -78,39 +90,79 @@ class Robot:
         self.can_move = True
         self.can_shoot = True
         self.debuff_timeout = 0
+        self.collision_tests = 0  # calls to hits_barrier and hits_robot, read by StepStats and not part of the state
 
+        self._sin, self._cos = math.sin(self.rotation), math.cos(self.rotation)  # pose transform, kept in step with rotation
         self._corners = [c.transform(self.center, self.rotation) for c in ROBOT.outline.corners]
-        self._armor_lines = [a.transform(self.center, self.rotation) for a in ROBOT.armor_lines]
-
-    def absorbs_bullet(self, trajectory: LineSegment):
+        self._armor_lines: list[LineSegment] | None = None  # placed on first use after the robot moved
+
+    def state(self):
+        return (
+            self.center.x, self.center.y, self.rotation, self.gimbal_yaw,
+            self.speed.x, self.speed.y, self.rotation_speed, self.gimbal_yaw_speed,
+            self.ammo, self.heat, self.hp, self.is_shooting, self.shot_cooldown,
+            self.barrier_hits, self.robot_hits, self.can_move, self.can_shoot, self.debuff_timeout)
+
+    def load_state(self, state: typing.Sequence[float]):
+        (self.center.x, self.center.y, self.rotation, self.gimbal_yaw,
+         self.speed.x, self.speed.y, self.rotation_speed, self.gimbal_yaw_speed) = state[:8]
+        self.ammo, self.heat, self.hp = int(state[8]), number_from_state(state[9]), number_from_state(state[10])
+        self.is_shooting, self.shot_cooldown = bool(state[11]), number_from_state(state[12])
+        self.barrier_hits, self.robot_hits = int(state[13]), int(state[14])
+        self.can_move, self.can_shoot, self.debuff_timeout = bool(state[15]), bool(state[16]), number_from_state(state[17])
+        self._sin, self._cos = math.sin(self.rotation), math.cos(self.rotation)
+        self._place_corners()
+        self._armor_lines = None
+
+    @property
+    def armor_lines(self) -> list[LineSegment]:
+        """ROBOT.armor_lines in the world frame."""
+        if self._armor_lines is None:
+            self._armor_lines = [LineSegment(Vector(0., 0.), Vector(0., 0.)) for _ in ROBOT.armor_lines]
+            for armor_line, local_armor_line in zip(self._armor_lines, ROBOT.armor_lines):
+                armor_line.set_transform(local_armor_line, self.center, self._sin, self._cos)
+        return self._armor_lines
+
+    def absorbs_bullet(self, armor_hits: typing.Sequence[bool], hits_outline: bool):
         if self.hp:
-            for armor_line, armor_damage in zip(self._armor_lines, ROBOT.armor_damages):
-                if trajectory.intersects(armor_line):
+            for armor_hit, armor_damage in zip(armor_hits, ROBOT.armor_damages):
+                if armor_hit:
                     self.hp -= armor_damage
                     self.team.take_damage(armor_damage)
                     return True
-        return ROBOT.outline.intersects(trajectory.inv_transform(self.center, self.rotation))
+        return hits_outline
 
     def hits_barrier(self, barrier: Box):
+        self.collision_tests += 1
         if self.center.distance_to(barrier.center) < ROBOT.outline.radius + barrier.radius and \
                 (any(barrier.contains(p) for p in self._corners) or
-                 any(ROBOT.outline.contains(p.inv_transform(self.center, self.rotation)) for p in barrier.corners)):
+                 any(self._outline_contains(p) for p in barrier.corners)):
             self.barrier_hits += 1
             return True
         return False
 
     def hits_robot(self, robot: Robot):
+        self.collision_tests += 1
         if self.center.distance_to(robot.center) < 2 * ROBOT.outline.radius and \
-                (any(ROBOT.outline.contains(p.inv_transform(robot.center, robot.rotation)) for p in self._corners) or
-                 any(ROBOT.outline.contains(p.inv_transform(self.center, self.rotation)) for p in robot._corners)):
+                boxes_overlap(ROBOT.half_dims, self.rotation, ROBOT.half_dims, robot.rotation, robot.center - self.center):
             self.robot_hits += 1
             return True
         return False
 
-    def hits(self, robots: tuple[Robot, Robot, Robot, Robot]):
+    def hits_static(self, collision_table: CollisionTable = None):
+        if collision_table is not None:
+            cell = collision_table.lookup(self.center, self.rotation)
+            if cell == COLLISION_TABLE.barrier:
+                self.barrier_hits += 1
+            if cell != COLLISION_TABLE.unknown:
+                return cell != COLLISION_TABLE.free
         return any([
             any(not FIELD.outline.contains(c) for c in self._corners),
-            any(self.hits_barrier(b) for b in [*FIELD.low_barriers, *FIELD.high_barriers]),
+            any(self.hits_barrier(b) for b in FIELD.barriers)])
+
+    def hits(self, robots: typing.Sequence[Robot], collision_table: CollisionTable = None):
+        return any([
+            self.hits_static(collision_table),
             any(self.hits_robot(r) for r in robots if r != self)])
 
     def shoot(self):
@@ -118,7 +170,8 @@ class Robot:
             self.ammo -= 1
             self.heat += BULLET.speed
             self.shot_cooldown = ROBOT.shot_cooldown
-            return Bullet(self)
+            return True
+        return False
 
     def control(self, command: RobotCommand):
         if not (self.hp and self.can_move):
@@ -142,32 +195,50 @@ class Robot:
         self.gimbal_yaw_speed = self._new_speed(self.gimbal_yaw_speed, gimbal_yaw_accel, ROBOT.gimbal_yaw_config)
         self.is_shooting = command.shoot
 
-    def step(self, time_remaining: float, robots: tuple[Robot, Robot, Robot, Robot]):
+    def step(self, time_remaining: float, robots: typing.Sequence[Robot], collision_table: CollisionTable = None) -> float:
+        """Moves the robot unless it would hit a barrier or one of `robots`. Returns the hp lost to heat."""
         self.debuff_timeout -= min(1, self.debuff_timeout)
         self.shot_cooldown -= min(1, self.shot_cooldown)
 
-        if not time_remaining % (0.1 * UNITS.s):
-            self.settle_heat()
+        heat_damage = self.settle_heat() if not time_remaining % (0.1 * UNITS.s) else 0
         if not self.debuff_timeout:
             self.can_move = True
             self.can_shoot = True
         if not self.hp:
-            return
+            return heat_damage
 
         if any([self.speed.x, self.speed.y, self.rotation_speed]):
-            old_center, old_rotation, old_corners = self.center.copy(), self.rotation, self._corners.copy()
-            self.center += self.speed.transform(angle=old_rotation)
+            old_x, old_y, old_rotation = self.center.x, self.center.y, self.rotation
+            old_sin, old_cos = self._sin, self._cos
+            self.center.x += old_cos * self.speed.x - old_sin * self.speed.y
+            self.center.y += old_sin * self.speed.x + old_cos * self.speed.y
             self.rotation = (self.rotation + self.rotation_speed) % (360 * UNITS.d)
-            self._corners = [p.transform(self.center, self.rotation) for p in ROBOT.outline.corners]
+            if self.rotation != old_rotation:
+                self._sin, self._cos = math.sin(self.rotation), math.cos(self.rotation)
+            self._place_corners()
+            self._armor_lines = None
 
-            if self.hits(robots):
+            if self.hits(robots, collision_table):
                 self.rotation_speed *= -ROBOT.rebound_coeff
-                self.speed *= -ROBOT.rebound_coeff
-                self.center, self.rotation, self._corners = old_center, old_rotation, old_corners
+                self.speed.x *= -ROBOT.rebound_coeff
+                self.speed.y *= -ROBOT.rebound_coeff
+                self.center.x, self.center.y, self.rotation = old_x, old_y, old_rotation
+                self._sin, self._cos = old_sin, old_cos
+                self._place_corners()
         self.gimbal_yaw = (self.gimbal_yaw + self.gimbal_yaw_speed) % (360 * UNITS.d)
-        self._armor_lines = [a.transform(self.center, self.rotation) for a in ROBOT.armor_lines]
+        return heat_damage
+
+    def _place_corners(self):  # updates the world-frame corners in place instead of allocating new ones
+        for corner, local_corner in zip(self._corners, ROBOT.outline.corners):
+            corner.set_transform(local_corner, self.center, self._sin, self._cos)
+
+    def _outline_contains(self, p: Vector):  # ROBOT.outline.contains(p.inv_transform(self.center, self.rotation)) without allocating
+        x, y = p.x - self.center.x, p.y - self.center.y
+        return ROBOT.outline.l < self._cos * x + self._sin * y < ROBOT.outline.r and ROBOT.outline.b < self._cos * y - self._sin * x < ROBOT.outline.t
 
-    def settle_heat(self):  # rules 4.1.2
+    def settle_heat(self) -> float:  # rules 4.1.2
+        """Returns the hp lost to heat. Armor damage past zero hp is only cleared here, it is not counted."""
+        hp = max(self.hp, 0)
         self.heat = max(self.heat - (12 if self.hp >= 400 else 24), 0)
         if 240 < self.heat < 360:
             self.hp -= (self.heat - 240) * 4
@@ -175,6 +246,7 @@ class Robot:
             self.hp -= (self.heat - 360) * 40
             self.heat = 360
         self.hp = max(self.hp, 0)
+        return hp - self.hp
 
     def apply_hp_buff(self):
         self.hp += 200
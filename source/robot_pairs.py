@@ -0,0 +1,41 @@
+from __future__ import annotations
+import math
+import typing
+import numpy as np
+from robot import ROBOT
+
+if typing.TYPE_CHECKING:
+    from robot import Robot
+
+
+class ROBOT_PAIRS:
+    pairs = list(zip(*(indices.tolist() for indices in np.triu_indices(4, k=1))))
+
+
+class RobotPairs:
+    """
+    Broad phase for collisions between robots. A pair is tested exactly only while the bounding circles of
+    its robots may touch. For a pair found apart the gap between its circles is kept, and each step it shrinks
+    by the speeds of both robots, which bound how far they move. The pair is skipped until the gap may be used up.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Call when robots were placed other than by stepping, like in Game.restore."""
+        self._gaps = [0.] * len(ROBOT_PAIRS.pairs)
+
+    def update(self, robots: tuple[Robot, Robot, Robot, Robot]) -> list[list[Robot]]:
+        """For each robot, the robots it may touch during this step, given the speeds set by Robot.control."""
+        speeds = [math.hypot(r.speed.x, r.speed.y) for r in robots]
+        nearby = [[] for _ in robots]
+        for index, (i, j) in enumerate(ROBOT_PAIRS.pairs):
+            gap = self._gaps[index] - speeds[i] - speeds[j]
+            if gap <= 0:
+                gap = robots[i].center.distance_to(robots[j].center) - 2 * ROBOT.outline.radius - speeds[i] - speeds[j]
+                if gap <= 0:
+                    nearby[i].append(robots[j])
+                    nearby[j].append(robots[i])
+            self._gaps[index] = gap
+        return nearby
@@ -2,11 +2,12 @@ import math
 import pathlib
 import os
 import enum
-import pygame
+import functools
 from geometry import Vector, Box, mirrors
 
 ASSETS_DIR = pathlib.Path(os.path.dirname(__file__)) / 'assets'
 IMAGES_DIR = ASSETS_DIR / 'images'
+RECORDS_DIR = pathlib.Path(os.path.dirname(__file__)).parent / 'records'
 
 
 class ZoneType(enum.Enum):
@@ -49,6 +50,7 @@ class FIELD:
         *mirrors(Box(Vector(0.2 * UNITS.m, 1 * UNITS.m), Vector(-2.44 * UNITS.m, -1.74 * UNITS.m))),
         *mirrors(Box(Vector(1 * UNITS.m, 0.2 * UNITS.m), Vector(0, 1.205 * UNITS.m)))
     ]
+    barriers = [*low_barriers, *high_barriers]
 
 
 class UI:
@@ -59,31 +61,67 @@ class UI:
     black = (0, 0, 0)
 
 
-class ASSETS:
-    background = pygame.image.load(IMAGES_DIR / 'background.png')
-    field = pygame.image.load(IMAGES_DIR / 'field.png')
-    guide = pygame.image.load(IMAGES_DIR / 'guide.png')
-    logo = pygame.image.load(IMAGES_DIR / 'logo.png')
-    bullet = pygame.image.load(IMAGES_DIR / 'robot/bullet.png')
-    blue_robot = pygame.image.load(IMAGES_DIR / 'robot/blue.png')
-    red_robot = pygame.image.load(IMAGES_DIR / 'robot/red.png')
-    dead_robot = pygame.image.load(IMAGES_DIR / 'robot/dead.png')
-    gimbal = pygame.image.load(IMAGES_DIR / 'robot/gimbal.png')
-    zone = {
-        ZoneType.blue_hp_buff: pygame.image.load(IMAGES_DIR / 'zone/blue_hp_buff.png'),
-        ZoneType.red_hp_buff: pygame.image.load(IMAGES_DIR / 'zone/red_hp_buff.png'),
-        ZoneType.blue_ammo_buff: pygame.image.load(IMAGES_DIR / 'zone/blue_ammo_buff.png'),
-        ZoneType.red_ammo_buff: pygame.image.load(IMAGES_DIR / 'zone/red_ammo_buff.png'),
-        ZoneType.move_debuff: pygame.image.load(IMAGES_DIR / 'zone/move_debuff.png'),
-        ZoneType.shoot_debuff: pygame.image.load(IMAGES_DIR / 'zone/shoot_debuff.png')
-    }
+class _Assets:  # images are loaded on first access, so headless games never import pygame
     navigation_file = ASSETS_DIR / 'navigation.json'
+    visibility_file = ASSETS_DIR / 'visibility.npz'  # built from navigation.json by tools/visibility_table.py
+
+    @functools.cached_property
+    def background(self):
+        return _load_image('background.png')
+
+    @functools.cached_property
+    def field(self):
+        return _load_image('field.png')
+
+    @functools.cached_property
+    def guide(self):
+        return _load_image('guide.png')
+
+    @functools.cached_property
+    def logo(self):
+        return _load_image('logo.png')
+
+    @functools.cached_property
+    def bullet(self):
+        return _load_image('robot/bullet.png')
+
+    @functools.cached_property
+    def blue_robot(self):
+        return _load_image('robot/blue.png')
+
+    @functools.cached_property
+    def red_robot(self):
+        return _load_image('robot/red.png')
+
+    @functools.cached_property
+    def dead_robot(self):
+        return _load_image('robot/dead.png')
+
+    @functools.cached_property
+    def gimbal(self):
+        return _load_image('robot/gimbal.png')
+
+    @functools.cached_property
+    def zone(self):
+        return {zone_type: _load_image(f'zone/{zone_type.name}.png') for zone_type in ZoneType}
+
+
+ASSETS = _Assets()
+
+
+def _load_image(path: str):
+    import pygame
+    return pygame.image.load(IMAGES_DIR / path)
 
 
 def limit_magnitude(value, top_value):
     return math.copysign(min(abs(value), top_value), value)
 
 
+def number_from_state(value: float):  # counters start out as int and only turn float through float rule constants
+    return int(value) if value.is_integer() else value
+
+
 def to_draw_coords(vector: Vector, offset=(0., 0.)):
     return FIELD.outline.dims.x / 2 + vector.x + offset[0], FIELD.outline.dims.y / 2 - vector.y + offset[1]
 
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import functools
+import json
+import math
+import pathlib
+import numpy as np
+from shared import UNITS, FIELD, ASSETS
+from geometry import Vector, box_bounds, batch_box_intersects
+
+
+class STATIC_VISIBILITY:
+    cell = 0.5 * UNITS.m  # coarse grid over FIELD.outline, each cell is represented by its center
+    chunk = 4096  # point pairs tested at once while building
+
+
+class StaticVisibility:
+    """
+    Static lines of sight between points of the field: the navigation nodes, followed by the centers of a
+    coarse grid of cells in row-major x, y order. `sight` is blocked by every barrier and `shot` only by high
+    barriers, which bullets cannot fly over. Each point keeps one row of bits, so a query is a bit test.
+    """
+
+    def __init__(self, nodes: np.ndarray, sight: np.ndarray, shot: np.ndarray):
+        self.nodes = nodes
+        self.shape = math.ceil(FIELD.outline.dims.x / STATIC_VISIBILITY.cell), math.ceil(FIELD.outline.dims.y / STATIC_VISIBILITY.cell)
+        self.point_count = len(nodes) + self.shape[0] * self.shape[1]
+        self._sight = sight
+        self._shot = shot
+        self._sight_rows = [int.from_bytes(row.tobytes(), 'little') for row in sight]
+        self._shot_rows = [int.from_bytes(row.tobytes(), 'little') for row in shot]
+
+    @classmethod
+    @functools.cache
+    def load(cls, file: pathlib.Path = ASSETS.visibility_file, navigation_file: pathlib.Path = ASSETS.navigation_file) -> StaticVisibility:
+        nodes = _load_nodes(navigation_file)
+        if file.exists():
+            with np.load(file) as data:
+                if np.array_equal(data['signature'], cls._signature(nodes)):
+                    return cls(nodes, data['sight'], data['shot'])
+        return cls.build(navigation_file)  # stale or missing, save one with tools/visibility_table.py to skip this
+
+    @classmethod
+    def build(cls, navigation_file: pathlib.Path = ASSETS.navigation_file) -> StaticVisibility:
+        nodes = _load_nodes(navigation_file)
+        points = np.concatenate((nodes, _cell_centers()))
+        starts, ends = np.triu_indices(len(points), k=1)
+        sight = np.zeros((len(points), len(points)), dtype=bool)
+        shot = np.zeros((len(points), len(points)), dtype=bool)
+        low_bounds, high_bounds = box_bounds(FIELD.low_barriers), box_bounds(FIELD.high_barriers)
+        for chunk in range(0, len(starts), STATIC_VISIBILITY.chunk):
+            a, b = starts[chunk:chunk + STATIC_VISIBILITY.chunk], ends[chunk:chunk + STATIC_VISIBILITY.chunk]
+            high_hits = batch_box_intersects(high_bounds, points[a, None], points[b, None]).any(axis=1)
+            low_hits = batch_box_intersects(low_bounds, points[a, None], points[b, None]).any(axis=1)
+            shot[a, b] = shot[b, a] = ~high_hits
+            sight[a, b] = sight[b, a] = ~(high_hits | low_hits)
+        np.fill_diagonal(sight, True)
+        np.fill_diagonal(shot, True)
+        return cls(nodes, np.packbits(sight, axis=1, bitorder='little'), np.packbits(shot, axis=1, bitorder='little'))
+
+    def save(self, file: pathlib.Path = ASSETS.visibility_file):
+        np.savez_compressed(file, sight=self._sight, shot=self._shot, signature=self._signature(self.nodes))
+
+    def point(self, position: Vector) -> int:
+        """Point of the cell containing `position`."""
+        x_index = min(max(int((position.x - FIELD.outline.l) // STATIC_VISIBILITY.cell), 0), self.shape[0] - 1)
+        y_index = min(max(int((position.y - FIELD.outline.b) // STATIC_VISIBILITY.cell), 0), self.shape[1] - 1)
+        return len(self.nodes) + x_index * self.shape[1] + y_index
+
+    def sees(self, a: int, b: int) -> bool:
+        return bool(self._sight_rows[a] >> b & 1)
+
+    def can_shoot(self, a: int, b: int) -> bool:
+        return bool(self._shot_rows[a] >> b & 1)
+
+    def seen_from(self, a: int) -> np.ndarray:
+        """Whether each point is in sight of `a`, nodes first and then the cells as a grid."""
+        return np.unpackbits(self._sight[a], count=self.point_count, bitorder='little').astype(bool)
+
+    def shootable_from(self, a: int) -> np.ndarray:
+        return np.unpackbits(self._shot[a], count=self.point_count, bitorder='little').astype(bool)
+
+    def cells(self, row: np.ndarray) -> np.ndarray:
+        """The cell part of a row from seen_from or shootable_from, shaped as the grid."""
+        return row[len(self.nodes):].reshape(self.shape)
+
+    @staticmethod
+    def _signature(nodes: np.ndarray):
+        return np.array([
+            STATIC_VISIBILITY.cell, *nodes.ravel(), *box_bounds(FIELD.low_barriers).ravel(), *box_bounds(FIELD.high_barriers).ravel()])
+
+
+def _load_nodes(navigation_file: pathlib.Path):
+    with open(navigation_file, 'r') as file:
+        return np.array(json.load(file)['nodes'])
+
+
+def _cell_centers():
+    xs = FIELD.outline.l + STATIC_VISIBILITY.cell * (np.arange(math.ceil(FIELD.outline.dims.x / STATIC_VISIBILITY.cell)) + 0.5)
+    ys = FIELD.outline.b + STATIC_VISIBILITY.cell * (np.arange(math.ceil(FIELD.outline.dims.y / STATIC_VISIBILITY.cell)) + 0.5)
+    return np.stack(np.meshgrid(xs, ys, indexing='ij'), axis=-1).reshape(-1, 2)
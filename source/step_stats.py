@@ -0,0 +1,70 @@
+from __future__ import annotations
+import json
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from game import Game
+
+
+class STEP_STATS:
+    phases = ('record', 'zone_reset', 'control', 'robots', 'zones', 'shoot', 'bullets', 'winner', 'observation')
+    counters = (
+        'steps',
+        'collision_tests',  # exact robot-barrier and robot-robot tests, a move with a collision table may need none
+        'barrier_hits', 'robot_hits', 'shots',
+        'bullet_hits',  # bullets that left the game on a barrier, a robot or the field outline
+        'bullets_alive')  # summed over steps, divide by steps for the mean
+
+
+class StepStats:
+    """
+    Seconds spent in each phase of Game.step and counts of what happened, summed since the last reset.
+    Attach one as Game.stats to collect them, a Game without stats only pays a None check per phase.
+    The fields can be polled at any time, `means` gives them per step.
+    """
+
+    __slots__ = ('seconds', 'counts', '_last_time', '_tests', '_hits', '_bullets', '_shots')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict.fromkeys(STEP_STATS.phases, 0.)
+        self.counts = dict.fromkeys(STEP_STATS.counters, 0)
+        self._last_time = 0.
+        self._tests = 0
+        self._hits = 0, 0
+        self._bullets = self._shots = 0
+
+    def begin(self, game: Game):
+        self._tests = sum(r.collision_tests for r in game.robots)
+        self._hits = sum(r.barrier_hits for r in game.robots), sum(r.robot_hits for r in game.robots)
+        self._bullets, self._shots = len(game.bullets), self.counts['shots']
+        self._last_time = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Adds the time since the previous lap to `phase`."""
+        now = time.perf_counter()
+        self.seconds[phase] += now - self._last_time
+        self._last_time = now
+
+    def end(self, game: Game):
+        self.lap('observation')
+        counts = self.counts
+        counts['steps'] += 1
+        counts['collision_tests'] += sum(r.collision_tests for r in game.robots) - self._tests
+        counts['barrier_hits'] += sum(r.barrier_hits for r in game.robots) - self._hits[0]
+        counts['robot_hits'] += sum(r.robot_hits for r in game.robots) - self._hits[1]
+        counts['bullet_hits'] += self._bullets + counts['shots'] - self._shots - len(game.bullets)
+        counts['bullets_alive'] += len(game.bullets)
+
+    def means(self) -> dict[str, float]:
+        """Microseconds per step of each phase and counts per step."""
+        steps = max(self.counts['steps'], 1)
+        return {
+            **{f'{phase}_us': 1e6 * seconds / steps for phase, seconds in self.seconds.items()},
+            **{name: count / steps for name, count in self.counts.items() if name != 'steps'}}
+
+    def dump(self, file: typing.TextIO):
+        json.dump({'seconds': self.seconds, 'counts': self.counts, 'means': self.means()}, file, indent=2)
@@ -2,6 +2,8 @@ from robot import Robot
 
 
 class Team:
+    __slots__ = 'is_blue', 'damage_taken', 'robots'
+
     def __init__(self, is_blue: bool):
         self.is_blue = is_blue
         self.damage_taken = 0
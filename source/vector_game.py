@@ -0,0 +1,123 @@
+from __future__ import annotations
+import multiprocessing
+import multiprocessing.connection
+import numpy as np
+from shared import Winner
+from game import Game
+from robot import RobotCommand
+from observation import OBSERVATION
+
+
+class VECTOR_GAME:
+    command_size = 5  # x_speed, y_speed, rotation_speed, gimbal_yaw_speed, shoot
+
+
+class VectorGame:
+    """
+    Runs `worker_count` processes that each own `games_per_worker` games. Commands, observations, rewards,
+    done flags and winners live in shared memory, so only short control messages cross the pipes.
+
+    Finished games are replaced by new ones inside step: for those, `observations` already shows the new
+    game while `dones` and `winners` describe the finished one. Rewards are the damage dealt minus the
+    damage taken by blue and red during the step. Observations are Observation.array of each game.
+    Returned arrays are views of the shared buffers and are overwritten by the next step.
+    Each slot gets its own child of `seed`, and every game started in a slot is seeded from it.
+    """
+
+    def __init__(self, worker_count: int, games_per_worker: int, seed: int | None = None):
+        self.size = worker_count * games_per_worker
+        seeds = np.random.SeedSequence(seed).spawn(self.size)
+        self._buffers = {
+            'commands': ('f', (self.size, 4, VECTOR_GAME.command_size)),
+            'observations': ('f', (self.size, OBSERVATION.size)),
+            'rewards': ('f', (self.size, 2)),
+            'dones': ('b', (self.size,)),
+            'winners': ('b', (self.size,))
+        }
+        arrays = {name: multiprocessing.RawArray(code, int(np.prod(shape))) for name, (code, shape) in self._buffers.items()}
+        views = _views(arrays, self._buffers)
+        self.commands, self.observations = views['commands'], views['observations']
+        self.rewards, self.dones, self.winners = views['rewards'], views['dones'].view(bool), views['winners']
+
+        self._connections = []
+        self._workers = []
+        for index in range(worker_count):
+            connection, worker_connection = multiprocessing.Pipe()
+            games = slice(index * games_per_worker, (index + 1) * games_per_worker)
+            worker = multiprocessing.Process(target=_work, args=(worker_connection, games, seeds[games], arrays, self._buffers), daemon=True)
+            worker.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+        self._waiting = False
+
+    def reset(self):
+        self._send('reset')
+        self._receive()
+        return self.observations
+
+    def step_async(self, commands: np.ndarray):
+        self.commands[...] = commands
+        self._send('step')
+        self._waiting = True
+
+    def step_wait(self):
+        self._receive()
+        self._waiting = False
+        return self.observations, self.rewards, self.dones, self.winners
+
+    def step(self, commands: np.ndarray):
+        self.step_async(commands)
+        return self.step_wait()
+
+    def close(self):
+        if self._waiting:
+            self._receive()
+        self._send('close')
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _send(self, message: str):
+        for connection in self._connections:
+            connection.send(message)
+
+    def _receive(self):
+        for connection in self._connections:
+            connection.recv()
+
+
+def _views(arrays: dict, buffers: dict):
+    dtypes = {'f': np.float32, 'b': np.int8}
+    return {name: np.frombuffer(arrays[name], dtype=dtypes[code]).reshape(shape) for name, (code, shape) in buffers.items()}
+
+
+def _work(connection: multiprocessing.connection.Connection, games: slice, seeds: list[np.random.SeedSequence], arrays: dict, buffers: dict):
+    views = {name: view[games] for name, view in _views(arrays, buffers).items()}
+    commands, observations, rewards = views['commands'], views['observations'], views['rewards']
+    dones, winners = views['dones'], views['winners']
+    instances: list[Game] = []
+
+    while (message := connection.recv()) != 'close':
+        if message == 'reset':
+            instances = [Game(seed=seed.spawn(1)[0]) for seed in seeds]
+            for game, observation in zip(instances, observations):
+                observation[:] = game.observation.array
+        elif message == 'step':
+            for index, game in enumerate(instances):
+                robot_commands = [RobotCommand(*command[:4], shoot=bool(command[4])) for command in commands[index].tolist()]
+                blue_damage, red_damage = game.teams[True].damage_taken, game.teams[False].damage_taken
+                game.step(robot_commands[0:2], robot_commands[2:4])
+                blue_reward = (game.teams[False].damage_taken - red_damage) - (game.teams[True].damage_taken - blue_damage)
+                rewards[index] = blue_reward, -blue_reward
+                dones[index] = game.winner is not Winner.tbd
+                winners[index] = game.winner.value
+                if dones[index]:
+                    instances[index] = game = Game(seed=seeds[index].spawn(1)[0])
+                observations[index] = game.observation.array
+        connection.send(None)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+import typing
+import numpy as np
+from shared import UNITS, FIELD
+from geometry import box_bounds, batch_box_intersects, batch_segments_intersect
+
+if typing.TYPE_CHECKING:
+    from robot import Robot
+
+
+class VISIBILITY:
+    camera_half_angle = 37.5 * UNITS.d  # around the gimbal direction
+    lidar_half_angle = 60 * UNITS.d  # around the chassis direction
+    barrier_bounds = box_bounds(FIELD.barriers)  # low barriers block sight too
+    pairs = np.triu_indices(4, k=1)
+    bystanders = (np.arange(4) != pairs[0][:, None]) & (np.arange(4) != pairs[1][:, None])  # robots that can block each pair
+    outline_order = (0, 1, 3, 2)  # Box.corners are (l, b), (l, t), (r, b), (r, t), this walks them around the outline
+
+
+class Visibility:
+    """
+    Which robots see which, as (4, 4) bool matrices in Game.robots order: row i, column j tells whether
+    robot i sees the center of robot j. The line between two centers is blocked by any barrier and by the
+    outline of any other robot. `camera` and `lidar` also require robot j inside the field of view of robot i.
+    """
+
+    __slots__ = ('line_of_sight', 'camera', 'lidar')
+
+    def __init__(self, robots: tuple[Robot, Robot, Robot, Robot]):
+        centers = np.array([(r.center.x, r.center.y) for r in robots])
+        corners = np.array([[(c.x, c.y) for c in r._corners] for r in robots])[:, VISIBILITY.outline_order]
+        rows, columns = VISIBILITY.pairs
+        starts, ends = centers[rows], centers[columns]
+
+        barrier_blocks = batch_box_intersects(VISIBILITY.barrier_bounds, starts[:, None], ends[:, None]).any(axis=1)
+        edge_blocks = batch_segments_intersect(
+            starts[:, None, None], ends[:, None, None], corners, np.roll(corners, -1, axis=1)).any(axis=2)
+        visible = ~(barrier_blocks | (edge_blocks & VISIBILITY.bystanders).any(axis=1))
+
+        self.line_of_sight = np.zeros((4, 4), dtype=bool)
+        self.line_of_sight[rows, columns] = self.line_of_sight[columns, rows] = visible
+
+        offsets = centers[None] - centers[:, None]
+        bearings = np.arctan2(offsets[..., 1], offsets[..., 0])
+        rotations = np.array([r.rotation for r in robots])
+        gimbal_yaws = np.array([r.gimbal_yaw for r in robots])
+        self.camera = self.line_of_sight & _within(bearings, rotations + gimbal_yaws, VISIBILITY.camera_half_angle)
+        self.lidar = self.line_of_sight & _within(bearings, rotations, VISIBILITY.lidar_half_angle)
+
+
+def _within(bearings: np.ndarray, directions: np.ndarray, half_angle: float):
+    return np.abs((bearings - directions[:, None] + np.pi) % (2 * np.pi) - np.pi) < half_angle
@@ -18,12 +18,16 @@ class ZONE:
 
 
 class Zone:
+    __slots__ = 'type_', 'is_activated', 'index', 'outline'
+
     def __init__(self, type_: ZoneType):
         self.type_ = type_
         self.is_activated = False
+        self.index = -1
         self.outline = None
 
-    def apply(self, robot: Robot, teams: dict[bool, Team]):
+    def apply(self, robot: Robot, teams: dict[bool, Team]) -> bool:
+        """Returns whether `robot` activated the zone."""
         if not self.is_activated and self.outline.contains(robot.center):
             self.is_activated = True
 
@@ -39,7 +43,17 @@ class Zone:
                 robot.apply_move_debuff()
             elif self.type_ is ZoneType.shoot_debuff:
                 robot.apply_shoot_debuff()
+            return True
+        return False
+
+    def load_state(self, index: int, is_activated: bool):
+        if index >= 0:
+            self.reset(index)
+        else:
+            self.index, self.outline = -1, None
+        self.is_activated = is_activated
 
     def reset(self, index: int):
         self.is_activated = False
+        self.index = index
         self.outline = ZONE.outlines[index]
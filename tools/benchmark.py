@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from shared import UNITS, Winner
+from game import Game
+from robot import RobotCommand, ROBOT
+from navigator import Navigator
+from step_stats import StepStats, STEP_STATS
+
+
+class BENCHMARK:
+    seed = 0
+    repeats = 3  # the fastest repeat is reported, the others absorb noise from the machine
+    scenario_steps = {'idle': 20 * UNITS.s, 'barriers': 20 * UNITS.s, 'firefight': 20 * UNITS.s, 'match': 180 * UNITS.s}
+    command_interval = UNITS.s // 2  # steps between new random commands in a match
+    navigator_queries = 2000
+    avoided_nodes = 2
+    graphic_frames = 500
+    tolerance = 0.1  # relative change counted as a regression by --compare
+
+
+def idle_commands(steps: int, rng: np.random.Generator):
+    return np.zeros((steps, 4, 5))
+
+
+def barrier_commands(steps: int, rng: np.random.Generator):
+    # every robot keeps driving forward and sideways, so it is pressed against a barrier or the field outline
+    commands = np.zeros((steps, 4, 5))
+    commands[..., 0] = ROBOT.drive_config.top_speed
+    commands[..., 1] = ROBOT.drive_config.top_speed * np.array([1, -1, 1, -1]) / 2
+    return commands
+
+
+def firefight_commands(steps: int, rng: np.random.Generator):
+    # robots strafe and sweep their gimbals back and forth while shooting nonstop
+    sweeps = np.where(np.arange(steps) // UNITS.s % 2, 1., -1.)[:, None]
+    commands = np.zeros((steps, 4, 5))
+    commands[..., 1] = sweeps * ROBOT.drive_config.top_speed / 2
+    commands[..., 3] = sweeps * ROBOT.gimbal_yaw_config.top_speed / 9 * np.array([1, -1, 1, -1])
+    commands[..., 4] = True
+    return commands
+
+
+def match_commands(steps: int, rng: np.random.Generator):
+    # random commands held for BENCHMARK.command_interval steps, shooting whenever a robot can
+    draws = rng.uniform(-1, 1, (-(-steps // BENCHMARK.command_interval), 4, 4))
+    draws *= [ROBOT.drive_config.top_speed, ROBOT.drive_config.top_speed, ROBOT.rotation_config.top_speed, ROBOT.gimbal_yaw_config.top_speed]
+    commands = np.concatenate((draws, np.ones((len(draws), 4, 1))), axis=-1)
+    return np.repeat(commands, BENCHMARK.command_interval, axis=0)[:steps]
+
+
+def refill(game: Game):  # keeps a firefight going past empty magazines and overheating
+    for robot in game.robots:
+        robot.ammo, robot.hp, robot.heat = 1000, 2000, 0
+
+
+SCENARIOS = {
+    'idle': (idle_commands, None),
+    'barriers': (barrier_commands, None),
+    'firefight': (firefight_commands, refill),
+    'match': (match_commands, None)
+}
+
+
+def play(game: Game, commands: np.ndarray, setup=None):
+    """Steps `game` through rows of (x_speed, y_speed, rotation_speed, gimbal_yaw_speed, shoot) per robot."""
+    for step, row in enumerate(commands.tolist()):
+        if setup is not None and not step % UNITS.s:
+            setup(game)
+        robot_commands = [RobotCommand(*values[:4], bool(values[4])) for values in row]
+        game.step(robot_commands[0:2], robot_commands[2:4])
+        if game.winner is not Winner.tbd:
+            return step + 1
+    return len(commands)
+
+
+def run_scenario(name: str, steps: int, repeats: int):
+    command_source, setup = SCENARIOS[name]
+    commands = command_source(steps, np.random.default_rng(BENCHMARK.seed))
+    seconds = []
+    for _ in range(repeats):
+        game = Game(seed=BENCHMARK.seed)
+        start = time.perf_counter()
+        steps_run = play(game, commands, setup)
+        seconds.append(time.perf_counter() - start)
+
+    game = Game(seed=BENCHMARK.seed)
+    game.stats = StepStats()
+    play(game, commands, setup)
+    means = game.stats.means()
+
+    tracemalloc.start()
+    play(Game(seed=BENCHMARK.seed), commands, setup)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'steps': steps_run,
+        'steps_per_second': steps_run / min(seconds),
+        'phase_us': {phase: means[f'{phase}_us'] for phase in STEP_STATS.phases},
+        'counts_per_step': {name: means[name] for name in STEP_STATS.counters if name != 'steps'},
+        'peak_bytes': peak_bytes
+    }
+
+
+def run_navigator(queries: int):
+    rng = np.random.default_rng(BENCHMARK.seed)
+    start = time.perf_counter()
+    navigator = Navigator()
+    build_seconds = time.perf_counter() - start
+    node_count = len(navigator.nodes)
+    pairs = rng.integers(node_count, size=(queries, 2)).tolist()
+    avoided = rng.integers(node_count, size=(queries, BENCHMARK.avoided_nodes)).tolist()
+    positions = rng.uniform(navigator.nodes.min(axis=0), navigator.nodes.max(axis=0), (queries, 4, 2))
+
+    def time_per_query(query):
+        start = time.perf_counter()
+        for i in range(queries):
+            query(i)
+        return 1e6 * (time.perf_counter() - start) / queries
+
+    return {
+        'build_us': 1e6 * build_seconds,
+        'navigate_us': time_per_query(lambda i: navigator.navigate(*pairs[i])),
+        'navigate_avoiding_us': time_per_query(lambda i: navigator.navigate(*pairs[i], avoided[i])),
+        'nearest_nodes_us': time_per_query(lambda i: navigator.nearest_nodes(positions[i]))
+    }
+
+
+def run_graphic_game(frames: int):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from graphic_game import GraphicGame
+    game = GraphicGame()
+    commands = firefight_commands(frames, np.random.default_rng(BENCHMARK.seed))
+    seconds = 0.
+    for step, row in enumerate(commands.tolist()):
+        if not step % UNITS.s:
+            refill(game)
+        robot_commands = [RobotCommand(*values[:4], bool(values[4])) for values in row]
+        game.step(robot_commands[0:2], robot_commands[2:4])
+        start = time.perf_counter()
+        game.render()
+        seconds += time.perf_counter() - start
+    return {'frame_us': 1e6 * seconds / frames}
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results: dict, prefix=''):
+    values = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[prefix + key] = value
+    return values
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Prints every shared metric with its change and returns the names of the ones that regressed."""
+    current, previous = flatten(results['results']), flatten(baseline['results'])
+    regressions = []
+    print(f'\nCompared to {baseline.get("revision")}:')
+    for name in sorted(current.keys() & previous.keys()):
+        if not previous[name]:
+            continue
+        change = current[name] / previous[name] - 1
+        if name.endswith('per_second'):
+            regressed = -change > tolerance
+        else:  # times and bytes should not grow, counts like steps are only shown
+            regressed = any(part.endswith(('_us', '_bytes')) for part in name.split('.')) and change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f'{name:<40}{previous[name]:>14.1f}{current[name]:>14.1f}{change:>+9.1%}{"  regression" if regressed else ""}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures Game.step throughput in fixed-seed scenarios, Navigator queries and GraphicGame frames.')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--steps', type=int, help='steps per scenario instead of BENCHMARK.scenario_steps')
+    parser.add_argument('--repeats', type=int, default=BENCHMARK.repeats)
+    parser.add_argument('--no-graphics', action='store_true', help='skip GraphicGame frame times')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run, exit with an error on regressions beyond --tolerance')
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK.tolerance)
+    args = parser.parse_args()
+
+    results = {'scenarios': {}}
+    for name in args.scenarios:
+        results['scenarios'][name] = result = run_scenario(name, args.steps or BENCHMARK.scenario_steps[name], args.repeats)
+        phases = ', '.join(f'{phase} {value:.1f}' for phase, value in result['phase_us'].items())
+        print(f'{name:<10}{result["steps_per_second"]:>9.0f} steps/s  {result["peak_bytes"] / 1024:>7.0f} KiB peak  '
+              f'{result["counts_per_step"]["bullets_alive"]:>5.1f} bullets  [us/step] {phases}')
+    results['navigator'] = run_navigator(BENCHMARK.navigator_queries)
+    print('navigator', ', '.join(f'{name} {value:.1f}' for name, value in results['navigator'].items()))
+    if not args.no_graphics:
+        results['graphic_game'] = run_graphic_game(BENCHMARK.graphic_frames)
+        print(f'graphic game frame_us {results["graphic_game"]["frame_us"]:.1f}')
+
+    report = {'revision': revision(), 'python': platform.python_version(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        if regressions := compare(report, baseline, args.tolerance):
+            print(f'{len(regressions)} metrics regressed by more than {args.tolerance:.0%}.')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import sys
+import tracemalloc
+from game import Game
+from geometry import Vector, LineSegment, Box
+from robot import RobotCommand, ROBOT
+
+
+class MEMORY_BENCHMARK:
+    game_count = 1000
+    warmup_steps = 250
+    measured_steps = 250
+
+    # budgets are checked by --check, raise them deliberately when a change needs more memory
+    max_bytes_per_game = 22000
+    max_allocations_per_step = 40
+    max_peak_bytes_per_step = 2000
+
+
+class AllocationCounter:
+    """Counts constructions of the simulation's small value classes while active."""
+    classes = (Vector, LineSegment, Box)
+
+    def __init__(self):
+        self.count = 0
+        self._inits = {}
+
+    def __enter__(self):
+        for cls in AllocationCounter.classes:
+            self._inits[cls] = init = cls.__init__
+            cls.__init__ = self._counting(init)
+        return self
+
+    def __exit__(self, *_):
+        for cls, init in self._inits.items():
+            cls.__init__ = init
+
+    def _counting(self, init):
+        def counting_init(*args, **kwargs):
+            self.count += 1
+            init(*args, **kwargs)
+        return counting_init
+
+
+def busy_commands():
+    commands = [RobotCommand(
+        x_speed=ROBOT.drive_config.top_speed, y_speed=ROBOT.drive_config.top_speed / 2,
+        rotation_speed=ROBOT.rotation_config.top_speed / 3, gimbal_yaw_speed=ROBOT.gimbal_yaw_config.top_speed / 4,
+        shoot=True) for _ in range(4)]
+    return commands[0:2], commands[2:4]
+
+
+def bytes_per_game(count: int, steps: int):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    games = [Game() for _ in range(count)]
+    for game in games:
+        for _ in range(steps):
+            game.step(*busy_commands())
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return used / count
+
+
+def step_costs(warmup_steps: int, measured_steps: int):
+    game = Game()
+    for _ in range(warmup_steps):
+        game.step(*busy_commands())
+    commands = [busy_commands() for _ in range(measured_steps)]
+
+    with AllocationCounter() as counter:
+        for blue_commands, red_commands in commands:
+            game.step(blue_commands, red_commands)
+
+    tracemalloc.start()
+    peak = 0
+    for blue_commands, red_commands in commands:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        game.step(blue_commands, red_commands)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - start)
+    tracemalloc.stop()
+    return counter.count / measured_steps, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reports memory held per Game and allocations per Game.step.')
+    parser.add_argument('--check', action='store_true', help='exit with an error if a budget in MEMORY_BENCHMARK is exceeded')
+    args = parser.parse_args()
+
+    game_bytes = bytes_per_game(MEMORY_BENCHMARK.game_count, MEMORY_BENCHMARK.warmup_steps // 10)
+    allocations, peak_bytes = step_costs(MEMORY_BENCHMARK.warmup_steps, MEMORY_BENCHMARK.measured_steps)
+    results = [
+        ('bytes per Game', game_bytes, MEMORY_BENCHMARK.max_bytes_per_game),
+        ('allocations per Game.step', allocations, MEMORY_BENCHMARK.max_allocations_per_step),
+        ('peak bytes per Game.step', peak_bytes, MEMORY_BENCHMARK.max_peak_bytes_per_step)
+    ]
+    for name, value, budget in results:
+        print(f'{name:<28}{value:>10.1f}  (budget {budget})')
+
+    if args.check and any(value > budget for _, value, budget in results):
+        print('Memory budget exceeded.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
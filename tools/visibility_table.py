@@ -0,0 +1,13 @@
+from shared import ASSETS
+from static_visibility import StaticVisibility
+
+
+def main():
+    table = StaticVisibility.build()
+    table.save()
+    print(f'Saved visibility of {table.point_count} points ({len(table.nodes)} nodes, {table.shape[0]}x{table.shape[1]} cells) '
+          f'to "{ASSETS.visibility_file.name}".')
+
+
+if __name__ == '__main__':
+    main()